@@ -1,14 +1,21 @@
 import math
 import sys
 from argparse import ArgumentParser
+from functools import lru_cache
+from time import perf_counter
 
 import cairo
 import pygame
 
-from helpfunctions import check_points_on_line, check_intersections
 from point import Point
+from cache import Cache, polygon_key
+from chain import ChainValidator
+from locate import TriangleLocator
 from earclipping_anim import EarClippingAnim
+from monotone_anim import MonotoneAnim
 from drawing import rgba_to_bgra
+from stats import TriangulationStats
+from worker import ValidationWorker, validate
 
 from examples import examples_dict
 
@@ -40,61 +47,155 @@ def draw_points(ctx: cairo.Context, pts):
     ctx.line_to(pts[0][0], pts[0][1])
     ctx.stroke()
 
-def draw_intersections(ctx: cairo.Context, pts):
+def draw_progress(ctx: cairo.Context, width, height, elapsed):
+    """Indicador de progreso: un arco que gira en el centro del área de dibujo"""
+    angle = elapsed * 2 * math.pi
+    ctx.set_line_width(4)
+    ctx.set_source_rgba(*rgba_to_bgra(1, 1, 1, 0.8))
+    ctx.arc(width / 2, height / 2, 20, angle, angle + 1.5 * math.pi)
+    ctx.stroke()
+
+def draw_highlight(ctx: cairo.Context, triangle):
+    """Resalta el triángulo bajo el cursor"""
+    ctx.set_source_rgba(*rgba_to_bgra(1, 0.8, 0, 0.5))
+    ctx.move_to(*triangle[0])
+    ctx.line_to(*triangle[1])
+    ctx.line_to(*triangle[2])
+    ctx.close_path()
+    ctx.fill()
+
+def draw_intersections(ctx: cairo.Context, pts, alpha=1.0):
     ctx.set_line_width(2)
-    ctx.set_source_rgba(*rgba_to_bgra(1, 0, 0, 1))
+    ctx.set_source_rgba(*rgba_to_bgra(1, 0, 0, alpha))
     for p in pts:
         ctx.arc(p[0], p[1], 5, 0, 2 * math.pi)
         ctx.stroke()
 
-def draw_info(screen, points, triangles_count, speed, pause, width):
-    font = pygame.font.SysFont('Arial', 22)
-    info_surface = pygame.Surface((400, 600))
-    info_surface.fill((0, 0, 0))
-    
-    points_text = f"Puntos: {len(points)}"
-    triangles_text = f"Triángulos: {triangles_count}"
-    speed_text = f"Velocidad: {'PAUSADA' if pause else f'{speed:.2f}'}"
-    
-    points_render = font.render(points_text, True, (255, 255, 255))
-    triangles_render = font.render(triangles_text, True, (255, 255, 255))
-    speed_render = font.render(speed_text, True, (255, 255, 255))
-    
-    info_surface.blit(points_render, (10, 50))
-    info_surface.blit(triangles_render, (10, 90))
-    info_surface.blit(speed_render, (10, 130))
-    
-    menu_text = [
-        "f     - Iniciar Triangulación",
-        "g     - Iniciar Triangulación con edge swapping",
-        "c     - Limpiar Pantalla",
-        "1-7   - Cargar Ejemplos",
-        "UP    - Aumentar velocidad de animación",
-        "DOWN  - Disminuir velocidad de animación",
-        "LEFT  - Reproducir la animación en retroceso",
-        "RIGHT - Reproducir la animación hacia adelante",
-        "SPACE - Pausar la animación"
-    ]
-    
-    y_offset = 170
-    for line in menu_text:
-        menu_render = font.render(line, True, (255, 255, 255))
-        info_surface.blit(menu_render, (10, y_offset))
-        y_offset += 30
-    
-    screen.blit(info_surface, (width - 400, 50))
+MENU_TEXT = [
+    "f     - Iniciar Triangulación",
+    "g     - Iniciar Triangulación con edge swapping",
+    "m     - Iniciar Triangulación por partición monótona",
+    "c     - Limpiar Pantalla",
+    "i     - Mostrar/ocultar estadísticas",
+    "1-7   - Cargar Ejemplos",
+    "UP    - Aumentar velocidad de animación",
+    "DOWN  - Disminuir velocidad de animación",
+    "LEFT  - Reproducir la animación en retroceso",
+    "RIGHT - Reproducir la animación hacia adelante",
+    "SPACE - Pausar la animación"
+]
+
+# Milisegundos máximos que se espera un evento cuando no hay nada que animar.
+IDLE_WAIT_MS = 500
+
+@lru_cache(maxsize=None)
+def get_font(size):
+    """Las fuentes se crean una sola vez (SysFont es costoso)"""
+    return pygame.font.SysFont('Arial', size)
+
+class InfoPanel:
+    """Panel lateral con los valores actuales y el menú (o las estadísticas).
+
+    El menú se renderiza una sola vez; los valores solo se vuelven a
+    renderizar cuando cambian."""
+
+    def __init__(self, width=400, height=600):
+        self.surface = pygame.Surface((width, height))
+        self.font = get_font(22)
+        self.small_font = get_font(18)
+        self.menu_renders = [self.font.render(line, True, (255, 255, 255)) for line in MENU_TEXT]
+        self.lines = None
+
+    def update(self, points, triangles_count, speed, pause, frame_ms, stats=None, validating=None, cache=None):
+        """Actualiza el contenido; devuelve True si cambió algo.
+
+        Si se pasa `stats`, sus líneas (y las de `cache`, si se pasa)
+        reemplazan al menú. `validating` son los segundos que lleva la
+        validación en curso, si hay una."""
+        lines = (
+            f"Puntos: {len(points)}",
+            f"Triángulos: {triangles_count}",
+            f"Velocidad: {'PAUSADA' if pause else f'{speed:.2f}'}",
+            f"Cuadro: {frame_ms:.1f} ms",
+        )
+        if validating is not None:
+            lines += (f"Validando... {validating:.1f} s",)
+        stats_lines = stats.lines() if stats is not None else None
+        if stats_lines is not None and cache is not None:
+            stats_lines += cache.lines()
+        if (lines, stats_lines) == self.lines:
+            return False
+        self.lines = (lines, stats_lines)
+
+        self.surface.fill((0, 0, 0))
+        y_offset = 50
+        for line in lines:
+            self.surface.blit(self.font.render(line, True, (255, 255, 255)), (10, y_offset))
+            y_offset += 40
+        if stats_lines is not None:
+            for line in stats_lines:
+                self.surface.blit(self.small_font.render(line, True, (255, 255, 255)), (10, y_offset))
+                y_offset += 24
+        else:
+            for menu_render in self.menu_renders:
+                self.surface.blit(menu_render, (10, y_offset))
+                y_offset += 30
+        return True
+
+def draw_info(screen, panel, width):
+    return screen.blit(panel.surface, (width - panel.surface.get_width(), 50))
+
+@lru_cache(maxsize=None)
+def render_title():
+    return get_font(32).render("Triangulador de Polígonos", True, (255, 255, 255))
 
 def draw_title(screen, width):
-    font = pygame.font.SysFont('Arial', 32)
-    title_text = "Triangulador de Polígonos"
-    title_render = font.render(title_text, True, (255, 255, 255))
-    screen.blit(title_render, ((width - title_render.get_width()) // 2, 10))
+    title_render = render_title()
+    return screen.blit(title_render, ((width - title_render.get_width()) // 2, 10))
+
+# Tecla de cada motor de triangulación.
+ENGINE_KEYS = (pygame.K_f, pygame.K_g, pygame.K_m)
+
+# Animaciones recientes por polígono limpio y motor: volver a un ejemplo no repite el algoritmo.
+ANIM_CACHE_ENTRIES = 8
+
+def create_anim(key, points, stats):
+    """Animación del motor elegido con `key` (una de ENGINE_KEYS)"""
+    if key == pygame.K_m:
+        return MonotoneAnim(points, stats=stats)
+    return EarClippingAnim(points, edge_swapping=key == pygame.K_g, stats=stats)
+
+def is_playing(anim, time, time_direction):
+    """True si la reproducción todavía puede avanzar en la dirección actual"""
+    if time_direction > 0:
+        return not anim.done or time < anim.length
+    return time > 0.0
+
+def export_example(args):
+    # Importación diferida: el módulo de exportación solo se carga cuando se usa.
+    from export import export_frames
+
+    points, intersections, _ = validate(examples_dict[args.example])
+    if intersections:
+        sys.exit(f"El ejemplo {args.example} tiene autointersecciones y no se puede triangular.")
+    count = export_frames(points, args.export, fps=args.fps, edge_swapping=args.edge_swapping,
+                          width=args.width, height=args.height, workers=args.workers)
+    print(f"{count} cuadros escritos en {args.export}")
 
 def main():
     parser = ArgumentParser()
     parser.add_argument("--width", type=int, default=1000, help="El ancho de la ventana de la aplicación.")
     parser.add_argument("--height", type=int, default=600, help="El alto de la ventana de la aplicación.")
+    parser.add_argument("--export", metavar="DIR", help="Exporta la animación como PNGs en DIR sin abrir la ventana.")
+    parser.add_argument("--fps", type=int, default=60, help="Cuadros por segundo de la exportación.")
+    parser.add_argument("--example", default="ex1", choices=list(examples_dict), help="Ejemplo a exportar.")
+    parser.add_argument("--edge-swapping", action="store_true", help="Exporta la triangulación con edge swapping.")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos para la exportación (por defecto, uno por núcleo).")
     args = parser.parse_args()
+
+    if args.export:
+        export_example(args)
+        return
     
     width, height = args.width, args.height
     info_panel_width = 400
@@ -102,8 +203,8 @@ def main():
     window = pygame.display.set_mode((width, height))
     clock = pygame.time.Clock()
 
+    # tiempo de reproducción en segundos del plan de animación
     time = 0.0
-    total_anim_length = 1.0
     speed = 1.0
     speed_diff_update = 1.5
     max_speed = speed_diff_update ** 7
@@ -117,69 +218,138 @@ def main():
     points = []
     intersections = []
     triangles_count = 0
+    stats = None
+    show_stats = False
+
+    # Superficies persistentes: cairo dibuja en `surface` y pygame lee el mismo búfer.
+    surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, width, height)
+    ctx = cairo.Context(surface)
+    ctx.set_antialias(cairo.Antialias(cairo.Antialias.GOOD))
+    image = pygame.image.frombuffer(surface.get_data(), (width, height), "RGBA")
+    screen = pygame.display.get_surface()
+    panel = InfoPanel(info_panel_width, height)
+    worker = ValidationWorker()
+    engine_key = None
+    anim_cache = Cache(ANIM_CACHE_ENTRIES)
+    # la cadena se valida a medida que se dibuja; `preview` son los cruces del punto bajo el cursor
+    validator = ChainValidator(0, 0, width - info_panel_width, height)
+    preview = []
+    # índice de los triángulos de la animación terminada y el que está bajo el cursor
+    locator = None
+    hovered = -1
+
+    dirty = True
+    idle = False
+    frame_ms = 0.0
 
     while True:
         
-        dt = clock.tick(60)
-        
-        if not pause:
-            time += dt * speed * time_direction / total_anim_length if (total_anim_length != 0) else 1.0
-        if time > 1.0: time = 1.0
-        if time < 0: time = 0
+        if idle:
+            # Nada que animar: dormir hasta el próximo evento.
+            events = [pygame.event.wait(IDLE_WAIT_MS)]
+            events.extend(pygame.event.get())
+            clock.tick()
+            dt = 0
+        else:
+            dt = clock.tick(60)
+            events = pygame.event.get()
 
-        surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, width, height)
+        playing = points_ready and not pause and is_playing(anim, time, time_direction)
+        if playing:
+            time += dt * speed * time_direction / 1000
+            # el plan se arma a medida que se reproduce: su duración final se conoce al terminar
+            if anim.done and time > anim.length: time = anim.length
+            if time < 0: time = 0
+            dirty = True
 
-        screen = pygame.display.get_surface()
-
-        ctx = cairo.Context(surface)
-        ctx.set_antialias(cairo.Antialias(cairo.Antialias.GOOD))
-        
-        ctx.set_source_rgba(*rgba_to_bgra(0, 0, 0, 1))
-        ctx.rectangle(0, 0, width, height)
-        ctx.fill()
-        
-        if not points_ready and points:
-            draw_points(ctx, points)
-            
-        if intersections:
-            draw_intersections(ctx, intersections)
+        if worker.ready():
+            try:
+                points, intersections, seconds = worker.result()
+            except ValueError as e:
+                print(f"\nNo se puede triangular: {e}")
+            else:
+                if not intersections:
+                    points_ready = True
+                    key = polygon_key([points], engine=engine_key)
+                    anim = anim_cache.get(key)
+                    if anim is None:
+                        stats = TriangulationStats()
+                        stats.phases["preprocess"] += seconds
+                        anim = create_anim(engine_key, points, stats)
+                        anim_cache.put(key, anim)
+                    else:
+                        # la animación guardada conserva lo ya calculado y sus estadísticas
+                        stats = anim.stats
+                    time = 0.0
+                    locator = None
+                    hovered = -1
+                else:
+                    stats = TriangulationStats()
+                    stats.phases["preprocess"] += seconds
+            dirty = True
+        elif worker.busy:
+            # el indicador de progreso se anima mientras tanto
+            dirty = True
 
-        ctx.set_line_width(2)
-        
-        for event in pygame.event.get():
+        for event in events:
             if event.type == pygame.QUIT:
+                worker.close()
                 pygame.quit()
                 sys.exit(0)
-            elif event.type == pygame.MOUSEBUTTONUP and not points_ready and not intersections:
+            elif event.type == pygame.MOUSEMOTION and not points_ready and not intersections and not worker.busy:
                 pos = pygame.mouse.get_pos()
-                if pos[0] < width - info_panel_width:
-                    points.append(Point(pos[0], pos[1]))
+                crossings = validator.probe(*pos) if pos[0] < width - info_panel_width else []
+                if crossings != preview:
+                    preview = crossings
+                    dirty = True
 
-            elif event.type == pygame.KEYDOWN and event.key == pygame.K_f and not intersections and len(points) >= 3:
-                points, _ = check_points_on_line(points)
-                intersections = check_intersections(points)
-                if not intersections:
-                    points_ready = True
-                    anim = EarClippingAnim(points)
-                    total_anim_length = sum((t for _, t in anim.schedule)) * 1000
-                    time = 0.0
-                    triangles_count = len(anim.triangles)
+            elif event.type == pygame.MOUSEMOTION and points_ready and anim.done and time >= anim.length:
+                # con la animación completa se resalta el triángulo bajo el cursor
+                if locator is None:
+                    locator = TriangleLocator(anim.triangles)
+                pos = pygame.mouse.get_pos()
+                triangle = locator.locate(*pos) if pos[0] < width - info_panel_width else -1
+                if triangle != hovered:
+                    hovered = triangle
+                    dirty = True
 
-            elif event.type == pygame.KEYDOWN and event.key == pygame.K_g and not intersections and len(points) >= 3:
-                points, _ = check_points_on_line(points)
-                intersections = check_intersections(points)
-                if not intersections:
-                    points_ready = True
-                    anim = EarClippingAnim(points, edge_swapping=True)
-                    total_anim_length = sum((t for _, t in anim.schedule)) * 1000
-                    time = 0.0
-                    triangles_count = len(anim.triangles)
+            elif event.type == pygame.MOUSEBUTTONUP and not points_ready and not intersections and not worker.busy:
+                pos = pygame.mouse.get_pos()
+                # los clics sobre el último punto o el primero no agregan nada
+                if pos[0] < width - info_panel_width and validator.append(Point(pos[0], pos[1])):
+                    points.append(Point(pos[0], pos[1]))
+                    preview = []
+                    dirty = True
+
+            elif event.type == pygame.KEYDOWN and event.key in ENGINE_KEYS and not intersections and len(points) >= 3:
+                # la validación corre en otro proceso; la animación se crea al recibir el resultado
+                engine_key = event.key
+                if validator.valid:
+                    # ya se validó al dibujar: el proceso solo limpia los puntos
+                    worker.submit(points, checked=True)
+                elif validator.crossings():
+                    intersections = validator.crossings()
+                else:
+                    worker.submit(points)
+                preview = []
+                dirty = True
 
             elif event.type == pygame.KEYDOWN and event.key == pygame.K_c:
+                worker.cancel()
                 points_ready = False
                 points = []
                 intersections = []
+                validator.reset()
+                preview = []
+                locator = None
+                hovered = -1
                 triangles_count = 0
+                stats = None
+                dirty = True
+
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_i:
+                show_stats = not show_stats
+                dirty = True
             
             elif event.type == pygame.KEYDOWN and event.key == pygame.K_UP:
                 speed *= speed_diff_update
@@ -204,22 +374,65 @@ def main():
                 print_speed(time_direction * speed, pause)
                 
             elif event.type == pygame.KEYDOWN and (event.key >= ord('1') and event.key <= ord('7')):
+                worker.cancel()
                 intersections = []
                 example_id = event.key - ord('0') - 1
                 points = (list(examples_dict.values()))[example_id]
+                validator.reset()
+                validator.extend(points)
+                preview = []
                 triangles_count = 0
+                stats = None
+                dirty = True
+
+            elif event.type == pygame.VIDEOEXPOSE:
+                dirty = True
+
+        if dirty:
+            frame_start = perf_counter()
+
+            ctx.set_source_rgba(*rgba_to_bgra(0, 0, 0, 1))
+            ctx.rectangle(0, 0, width, height)
+            ctx.fill()
+
+            if not points_ready and points:
+                draw_points(ctx, points)
+
+            if intersections:
+                draw_intersections(ctx, intersections)
+            elif not points_ready:
+                draw_intersections(ctx, validator.intersections)
+                # cruces de la arista de cierre actual y del punto bajo el cursor
+                draw_intersections(ctx, validator.closing + preview, alpha=0.5)
+
+            if worker.busy:
+                draw_progress(ctx, width - info_panel_width, height, worker.elapsed())
+
+            ctx.set_line_width(2)
+
+            if points_ready:
+                anim(ctx, time)
+                triangles_count = len(anim.triangles)
+                if hovered >= 0 and anim.done and time >= anim.length:
+                    draw_highlight(ctx, locator.triangles[hovered])
 
-        if points_ready:
-            anim(ctx, time)
+            surface.flush()
+            screen.blit(image, (0, 0))
 
-        buf = surface.get_data()
-        image = pygame.image.frombuffer(buf, (width, height), "RGBA")
-        screen.blit(image, (0, 0))
+            draw_title(screen, width)  # Dibujar el título antes de la información
+            panel.update(points, triangles_count, speed, pause, frame_ms, stats if show_stats else None,
+                         worker.elapsed() if worker.busy else None, anim_cache)
+            draw_info(screen, panel, width)
+            pygame.display.flip()
 
-        draw_title(screen, width)  # Dibujar el título antes de la información
-        draw_info(screen, points, triangles_count, speed, pause, width)
+            frame_ms = (perf_counter() - frame_start) * 1000
+            dirty = False
+        elif panel.update(points, triangles_count, speed, pause, frame_ms, stats if show_stats else None,
+                          worker.elapsed() if worker.busy else None, anim_cache):
+            # Solo cambió el panel (velocidad, pausa, tiempo de cuadro): actualizar su rectángulo.
+            pygame.display.update(draw_info(screen, panel, width))
 
-        pygame.display.flip()
+        idle = not (worker.busy or points_ready and not pause and is_playing(anim, time, time_direction))
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,140 @@
+import json
+import os
+import sys
+from argparse import ArgumentParser
+from contextlib import nullcontext
+from time import perf_counter
+
+from cache import Cache, pack_triangles, polygon_key, unpack_triangles
+from formats import READERS, EXTENSIONS, TextTriangleWriter, BinaryTriangleWriter
+from monotone import triangulate_monotone
+from preprocess import prepare
+from stats import TriangulationStats
+from sweepline import is_simple
+from triangulation import triangulate
+
+def _validate(rings):
+    if not is_simple(rings[0], holes=rings[1:]):
+        raise ValueError("el polígono se autointersecta")
+
+def _preprocess(rings, validate):
+    """Limpia y orienta los anillos; el mapa de índices es sobre la concatenación de los anillos de entrada"""
+    polygon = prepare(rings[0], holes=rings[1:])
+    rings = [polygon.vertices] + polygon.holes
+    if validate:
+        _validate(rings)
+    return rings, polygon.index_map
+
+def _phase(stats, name):
+    return stats.phase(name) if stats is not None else nullcontext()
+
+def create_cache(max_entries=1024, directory=None, max_bytes=64 << 20):
+    """Caché de triangulaciones para triangulate_records; con `directory` también se guardan en disco"""
+    return Cache(max_entries, directory, max_bytes, dumps=pack_triangles, loads=unpack_triangles)
+
+def triangulate_records(records, edge_swapping=False, validate=True, on_error=None, stats=None, engine="earclipping",
+                        cache=None):
+    """Pipeline perezoso: por cada (id, anillos) produce (id, cantidad de vértices, triángulos).
+
+    Los triángulos son tripletas de índices sobre los anillos (exterior y
+    después los huecos) tal como venían en la entrada. Los polígonos inválidos se saltan y se informan a
+    `on_error(id, error)`. Con `stats` se acumulan los contadores y tiempos
+    de todos los polígonos. `engine` elige entre "earclipping" y "monotone".
+
+    Con `cache` (ver create_cache) los polígonos que, ya limpios, repiten
+    uno triangulado antes con las mismas opciones no se vuelven a validar
+    ni a triangular."""
+    for record_id, rings in records:
+        try:
+            with _phase(stats, "preprocess"):
+                rings, index_map = _preprocess(rings, validate and cache is None)
+            key = None
+            triangles = None
+            if cache is not None:
+                # los inválidos no llegan a guardarse, así que un acierto validado no necesita validarse de nuevo
+                key = polygon_key(rings, engine=engine, edge_swapping=edge_swapping and engine != "monotone",
+                                  validated=validate)
+                triangles = cache.get(key)
+            if triangles is None:
+                if cache is not None and validate:
+                    with _phase(stats, "preprocess"):
+                        _validate(rings)
+                if engine == "monotone":
+                    triangles = triangulate_monotone(rings[0], indices=True, holes=rings[1:], stats=stats)
+                else:
+                    triangles = triangulate(rings[0], edge_swapping=edge_swapping, indices=True, stats=stats,
+                                            holes=rings[1:])
+                if cache is not None:
+                    cache.put(key, triangles)
+        except ValueError as e:
+            if on_error is not None:
+                on_error(record_id, e)
+            continue
+        yield record_id, len(index_map), [(index_map[a], index_map[b], index_map[c]) for a, b, c in triangles]
+
+def _report_error(record_id, error):
+    print(f"polígono {record_id}: {error}", file=sys.stderr)
+
+def main():
+    parser = ArgumentParser(description="Triangula en streaming colecciones de polígonos desde archivos.")
+    parser.add_argument("input", help="Archivo de entrada (WKT, GeoJSON, CSV id,x,y o binario).")
+    parser.add_argument("-o", "--output", help="Archivo de salida; .bin escribe triángulos en binario. Por defecto, stdout.")
+    parser.add_argument("--format", choices=list(READERS), help="Formato de entrada (por defecto, según la extensión).")
+    parser.add_argument("--engine", choices=["earclipping", "monotone"], default="earclipping",
+                        help="Algoritmo de triangulación.")
+    parser.add_argument("--edge-swapping", action="store_true", help="Aplica edge swapping a cada triangulación (solo earclipping).")
+    parser.add_argument("--no-validate", action="store_true", help="No comprueba autointersecciones antes de triangular.")
+    parser.add_argument("--stats", action="store_true", help="Imprime contadores y tiempos por fase en JSON al terminar.")
+    parser.add_argument("--cache", action="store_true", help="No vuelve a triangular los polígonos repetidos.")
+    parser.add_argument("--cache-dir", metavar="DIR", help="Guarda también las triangulaciones en DIR, entre ejecuciones (implica --cache).")
+    parser.add_argument("--cache-mb", type=float, default=64, help="Tamaño máximo en MB de --cache-dir.")
+    args = parser.parse_args()
+
+    fmt = args.format or EXTENSIONS.get(os.path.splitext(args.input)[1].lower())
+    if fmt is None:
+        parser.error("no se reconoce la extensión de la entrada; use --format")
+
+    if args.output and args.output.endswith(".bin"):
+        out = open(args.output, "wb")
+        writer = BinaryTriangleWriter(out)
+    elif args.output:
+        out = open(args.output, "w")
+        writer = TextTriangleWriter(out)
+    else:
+        out = None
+        writer = TextTriangleWriter(sys.stdout)
+
+    errors = []
+    def on_error(record_id, error):
+        errors.append(record_id)
+        _report_error(record_id, error)
+
+    stats = TriangulationStats() if args.stats else None
+    cache = None
+    if args.cache or args.cache_dir:
+        cache = create_cache(directory=args.cache_dir, max_bytes=int(args.cache_mb * (1 << 20)))
+    polygons = 0
+    vertices = 0
+    start = perf_counter()
+    try:
+        records = READERS[fmt](args.input)
+        for record_id, n, triangles in triangulate_records(records, args.edge_swapping, not args.no_validate, on_error, stats,
+                                                           args.engine, cache):
+            writer.write(record_id, triangles)
+            polygons += 1
+            vertices += n
+    finally:
+        if out is not None:
+            out.close()
+    elapsed = max(perf_counter() - start, 1e-9)
+
+    print(f"{polygons} polígonos, {vertices} vértices en {elapsed:.3f} s "
+          f"({polygons / elapsed:.1f} polígonos/s, {vertices / elapsed:.1f} vértices/s); "
+          f"{len(errors)} con errores", file=sys.stderr)
+    if cache is not None:
+        print(cache.lines()[0], file=sys.stderr)
+    if stats is not None:
+        print(json.dumps(stats.as_dict(), indent=1), file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
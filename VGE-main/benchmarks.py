@@ -0,0 +1,272 @@
+import json
+import math
+import platform
+import random
+import subprocess
+import sys
+from argparse import ArgumentParser
+from time import perf_counter
+
+import vectorized
+from helpfunctions import check_intersections, check_points_on_line
+from monotone import triangulate_monotone
+from triangulation import triangulate
+
+# Generadores de polígonos simples escalables. Todos devuelven una lista de
+# tuplas (x, y) dentro de [0, 1] x [0, 1] en orden de recorrido.
+
+def star(n, seed=0):
+    """Estrellado respecto al centro: ángulos regulares con ruido y radios aleatorios"""
+    rng = random.Random(seed)
+    step = 2 * math.pi / n
+    out = []
+    for i in range(n):
+        angle = (i + 0.8 * rng.random()) * step
+        radius = 0.1 + 0.4 * rng.random()
+        out.append((0.5 + radius * math.cos(angle), 0.5 + radius * math.sin(angle)))
+    return out
+
+def spiral(n, seed=0, turns=4):
+    """Banda en espiral: sale por el borde exterior y vuelve por el interior"""
+    half = max(n // 2, 2)
+    # unos 12 vértices por vuelta bastan para que las cuerdas no crucen la vuelta vecina
+    turns = min(turns, (half - 1) / 12)
+    pitch = 0.45 / (turns + 1)
+    width = 0.5 * pitch
+    outer = []
+    inner = []
+    for i in range(half):
+        theta = 2 * math.pi * turns * i / (half - 1)
+        r = pitch * (1 + theta / (2 * math.pi))
+        outer.append((0.5 + r * math.cos(theta), 0.5 + r * math.sin(theta)))
+        inner.append((0.5 + (r - width) * math.cos(theta), 0.5 + (r - width) * math.sin(theta)))
+    return outer + inner[::-1]
+
+def comb(n, seed=0):
+    """Peine: dientes en zigzag sobre una base horizontal"""
+    teeth = max((n - 2) // 2, 1)
+    out = []
+    for i in range(teeth):
+        out.append(((i + 0.5) / teeth, 0.95))
+        out.append(((i + 1) / teeth, 0.1))
+    out[-1] = (1.0, 0.1)
+    return out + [(1.0, 0.0), (0.0, 0.0), (0.0, 0.1)]
+
+def random_walk(n, seed=0):
+    """x-monótono: dos caminatas aleatorias sobre las mismas abscisas, una encima de la otra"""
+    rng = random.Random(seed)
+    half = max(n // 2, 2)
+    low = []
+    high = []
+    y = 0.0
+    for i in range(half):
+        y += rng.uniform(-1, 1)
+        low.append(y)
+        high.append(y + 0.2 + rng.random())
+    min_y = min(low)
+    span = max(high) - min_y
+    xs = [i / (half - 1) for i in range(half)]
+    lower = [(x, (y - min_y) / span) for x, y in zip(xs, low)]
+    upper = [(x, (y - min_y) / span) for x, y in zip(xs, high)]
+    return lower + upper[::-1]
+
+def near_collinear(n, seed=0):
+    """Cuadrado con muchos vértices por lado, apenas desplazados hacia afuera"""
+    per_side = max(n // 4, 1)
+    corners = [(0.0, 0.0), (1.0, 0.0), (1.0, 1.0), (0.0, 1.0)]
+    normals = [(0.0, -1.0), (1.0, 0.0), (0.0, 1.0), (-1.0, 0.0)]
+    out = []
+    for k in range(4):
+        (x0, y0), (x1, y1) = corners[k], corners[(k + 1) % 4]
+        nx, ny = normals[k]
+        for i in range(per_side):
+            t = i / per_side
+            bulge = 1e-9 * t * (1 - t)
+            out.append((x0 + t * (x1 - x0) + bulge * nx, y0 + t * (y1 - y0) + bulge * ny))
+    return out
+
+GENERATORS = {
+    "star": star,
+    "spiral": spiral,
+    "comb": comb,
+    "random_walk": random_walk,
+    "near_collinear": near_collinear,
+}
+
+def scale(polygon, width, height, margin=20):
+    """Lleva un polígono del cuadrado unidad a la ventana, como los ejemplos"""
+    sx = width - 2 * margin
+    sy = height - 2 * margin
+    return [(margin + x * sx, margin + y * sy) for x, y in polygon]
+
+def measure(fn, repeat):
+    """Mejor tiempo de `repeat` ejecuciones y el último resultado"""
+    best = math.inf
+    result = None
+    for _ in range(repeat):
+        start = perf_counter()
+        result = fn()
+        best = min(best, perf_counter() - start)
+    return best, result
+
+def _render_benchmark(polygon, edge_swapping, frames, width, height):
+    """Tiempo de construir el plan de EarClippingAnim y tiempo medio por cuadro"""
+    import cairo
+    from drawing import rgba_to_bgra
+    from earclipping_anim import EarClippingAnim
+
+    start = perf_counter()
+    anim = EarClippingAnim(polygon, edge_swapping=edge_swapping)
+    duration = anim.complete()
+    schedule_time = perf_counter() - start
+
+    surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, width, height)
+    ctx = cairo.Context(surface)
+    start = perf_counter()
+    for i in range(frames):
+        ctx.set_source_rgba(*rgba_to_bgra(0, 0, 0, 1))
+        ctx.rectangle(0, 0, width, height)
+        ctx.fill()
+        ctx.set_line_width(2)
+        anim(ctx, duration * i / max(frames - 1, 1))
+        surface.flush()
+    return schedule_time, (perf_counter() - start) / frames
+
+def run(generators, sizes, repeat=3, budget=10.0, anim_max=10 ** 4, frames=30,
+        edge_swapping=False, width=1000, height=600, log=None):
+    """Ejecuta la matriz generador x tamaño y devuelve una fila por medición.
+
+    Cuando una operación tarda más que `budget` segundos en un tamaño, los
+    tamaños mayores de ese generador se saltan para esa operación."""
+    try:
+        import cairo  # noqa: F401
+        has_cairo = True
+    except ImportError:
+        has_cairo = False
+
+    results = []
+    for name in generators:
+        over_budget = set()
+
+        def record(operation, n, seconds, **extra):
+            row = {"generator": name, "n": n, "operation": operation, "seconds": seconds}
+            row.update(extra)
+            results.append(row)
+            if log is not None:
+                log(f"{name:>15} {n:>8} {operation:<22} {seconds:.6f} s")
+            if seconds > budget:
+                over_budget.add(operation)
+
+        for n in sizes:
+            polygon = scale(GENERATORS[name](n), width, height)
+
+            if "check_points_on_line" not in over_budget:
+                seconds, (polygon, _) = measure(lambda: check_points_on_line(polygon), repeat)
+                record("check_points_on_line", n, seconds)
+            else:
+                polygon, _ = check_points_on_line(polygon)
+            vertices = len(polygon)
+
+            if "check_intersections" not in over_budget:
+                seconds, points = measure(lambda: check_intersections(polygon, first_only=True), repeat)
+                if points:
+                    raise RuntimeError(f"{name}({n}) no es simple")
+                record("check_intersections", n, seconds, vertices=vertices)
+
+            if "triangulate" not in over_budget:
+                seconds, _ = measure(lambda: triangulate(polygon, edge_swapping=edge_swapping), repeat)
+                record("triangulate", n, seconds, vertices=vertices)
+
+            if "triangulate_monotone" not in over_budget:
+                seconds, _ = measure(lambda: triangulate_monotone(polygon), repeat)
+                record("triangulate_monotone", n, seconds, vertices=vertices)
+
+            if has_cairo and n <= anim_max and "schedule" not in over_budget:
+                schedule_time, frame_time = _render_benchmark(polygon, edge_swapping, frames, width, height)
+                record("schedule", n, schedule_time, vertices=vertices)
+                record("render_frame", n, frame_time, vertices=vertices, frames=frames)
+    return results
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(old_results, new_results):
+    """Cociente nuevo/antiguo para cada medición presente en ambos resultados"""
+    old = {(r["generator"], r["n"], r["operation"]): r["seconds"] for r in old_results}
+    out = []
+    for r in new_results:
+        key = (r["generator"], r["n"], r["operation"])
+        if key in old and old[key] > 0:
+            out.append((key, old[key], r["seconds"], r["seconds"] / old[key]))
+    return out
+
+def growth(results, operation="triangulate", min_seconds=0.01):
+    """Exponente de crecimiento entre tamaños consecutivos de cada generador.
+
+    Si el tiempo crece como n^k, log(t2 / t1) / log(n2 / n1) estima k. Las
+    mediciones de menos de `min_seconds` se omiten: en ellas manda el ruido."""
+    by_generator = {}
+    for r in results:
+        if r["operation"] == operation and r["seconds"] >= min_seconds:
+            by_generator.setdefault(r["generator"], []).append((r["n"], r["seconds"]))
+    out = []
+    for name, rows in by_generator.items():
+        rows.sort()
+        for (n1, t1), (n2, t2) in zip(rows, rows[1:]):
+            out.append((name, n1, n2, math.log(t2 / t1) / math.log(n2 / n1)))
+    return out
+
+def main():
+    parser = ArgumentParser(description="Mide cómo escalan la validación, la triangulación y el renderizado.")
+    parser.add_argument("-o", "--output", help="Archivo JSON de resultados (por defecto, la salida estándar).")
+    parser.add_argument("--generators", nargs="+", default=list(GENERATORS), choices=list(GENERATORS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10 ** k for k in range(1, 7)],
+                        help="Cantidades de vértices (por defecto de 10 a 10^6).")
+    parser.add_argument("--repeat", type=int, default=3, help="Repeticiones por medición; se guarda la mejor.")
+    parser.add_argument("--budget", type=float, default=10.0,
+                        help="Segundos por medición a partir de los cuales se saltan los tamaños mayores.")
+    parser.add_argument("--anim-max", type=int, default=10 ** 4,
+                        help="Tamaño máximo para medir el plan de animación y el renderizado.")
+    parser.add_argument("--frames", type=int, default=30, help="Cuadros a renderizar por polígono.")
+    parser.add_argument("--edge-swapping", action="store_true", help="Mide la triangulación con edge swapping.")
+    parser.add_argument("--compare", metavar="JSON", help="Resultados anteriores con los que comparar.")
+    parser.add_argument("--max-exponent", type=float, metavar="K",
+                        help="Falla si el tiempo de triangulate crece más rápido que n^K entre dos tamaños.")
+    args = parser.parse_args()
+
+    results = run(args.generators, sorted(args.sizes), args.repeat, args.budget, args.anim_max,
+                  args.frames, args.edge_swapping, log=lambda line: print(line, file=sys.stderr))
+    report = {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "numpy": vectorized.available(),
+        "edge_swapping": args.edge_swapping,
+        "results": results,
+    }
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=1)
+        print()
+    else:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=1)
+
+    if args.compare:
+        with open(args.compare) as f:
+            old = json.load(f)["results"]
+        for (name, n, operation), before, after, ratio in compare(old, results):
+            print(f"{name:>15} {n:>8} {operation:<22} {before:.6f} -> {after:.6f} s  x{ratio:.2f}", file=sys.stderr)
+
+    if args.max_exponent is not None:
+        too_fast = []
+        for name, n1, n2, exponent in growth(results):
+            print(f"{name:>15} {n1:>8} -> {n2:<8} triangulate ~ n^{exponent:.2f}", file=sys.stderr)
+            if exponent > args.max_exponent:
+                too_fast.append(name)
+        if too_fast:
+            sys.exit(f"triangulate crece más rápido que n^{args.max_exponent}: {', '.join(too_fast)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import hashlib
+import os
+import sys
+from array import array
+from collections import OrderedDict
+
+def polygon_key(rings, **options):
+    """Clave de contenido de un polígono: hash de sus anillos y de las opciones.
+
+    Los anillos deben venir limpios y orientados (ver preprocess.prepare),
+    de modo que las entradas que solo difieren en vértices repetidos o
+    colineales o en el sentido de recorrido comparten clave. Las rotaciones
+    de un mismo anillo tienen claves distintas: sus triangulaciones también
+    pueden serlo."""
+    digest = hashlib.blake2b(digest_size=16)
+    for ring in rings:
+        coords = array("d", [c for p in ring for c in (p[0], p[1])])
+        if sys.byteorder != "little":
+            coords.byteswap()
+        digest.update(len(ring).to_bytes(8, "little"))
+        digest.update(coords.tobytes())
+    digest.update(repr(sorted(options.items())).encode())
+    return digest.hexdigest()
+
+def pack_triangles(triangles):
+    """Tripletas de índices a bytes (enteros sin signo de 32 bits, little-endian)"""
+    data = array("I", [i for triangle in triangles for i in triangle])
+    if sys.byteorder != "little":
+        data.byteswap()
+    return data.tobytes()
+
+def unpack_triangles(data):
+    indices = array("I")
+    indices.frombytes(data)
+    if sys.byteorder != "little":
+        indices.byteswap()
+    return list(zip(indices[0::3], indices[1::3], indices[2::3]))
+
+class Cache:
+    """Memoización por clave de contenido con una capa LRU en memoria y otra opcional en disco.
+
+    En memoria se guardan hasta `max_entries` valores tal cual, y se
+    descartan los usados hace más tiempo. Con `directory` los valores
+    también se escriben en disco (serializados con `dumps` y leídos con
+    `loads`), un archivo por clave; cuando los archivos superan `max_bytes`
+    se borran los usados hace más tiempo. Un acierto en disco vuelve a
+    subir a memoria. `hits`, `disk_hits` y `misses` cuentan las consultas."""
+
+    def __init__(self, max_entries=128, directory=None, max_bytes=64 << 20, dumps=None, loads=None):
+        if directory is not None and (dumps is None or loads is None):
+            raise ValueError("la capa en disco necesita dumps y loads")
+        self.max_entries = max_entries
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.dumps = dumps
+        self.loads = loads
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        # nombre de archivo -> bytes, del usado hace más tiempo al más reciente
+        self.files = OrderedDict()
+        self.disk_bytes = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            found = []
+            for entry in os.scandir(directory):
+                if entry.is_file() and entry.name.endswith(".bin"):
+                    stat = entry.stat()
+                    found.append((stat.st_mtime, entry.name, stat.st_size))
+            for _, name, size in sorted(found):
+                self.files[name] = size
+                self.disk_bytes += size
+            self._evict_files()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key, default=None):
+        """Valor guardado para `key` o `default`; cuenta el acierto o el fallo"""
+        value = self.entries.get(key)
+        if value is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+        if self.directory is not None:
+            value = self._read(key)
+            if value is not None:
+                self.disk_hits += 1
+                self._remember(key, value)
+                return value
+        self.misses += 1
+        return default
+
+    def put(self, key, value):
+        self._remember(key, value)
+        if self.directory is not None:
+            self._write(key, value)
+
+    def lines(self):
+        """Aciertos (en memoria y en disco) y fallos, como una tupla de una sola línea"""
+        return (f"Caché: {self.hits + self.disk_hits} aciertos ({self.disk_hits} disco), {self.misses} fallos",)
+
+    def _remember(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def _read(self, key):
+        name = f"{key}.bin"
+        if name not in self.files:
+            return None
+        path = os.path.join(self.directory, name)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            # la fecha de modificación guarda el orden de uso entre ejecuciones
+            os.utime(path)
+        except OSError:
+            self.disk_bytes -= self.files.pop(name)
+            return None
+        self.files.move_to_end(name)
+        return self.loads(data)
+
+    def _write(self, key, value):
+        name = f"{key}.bin"
+        data = self.dumps(value)
+        path = os.path.join(self.directory, name)
+        # escritura atómica: otro proceso nunca ve un archivo a medias
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        self.disk_bytes += len(data) - self.files.pop(name, 0)
+        self.files[name] = len(data)
+        self._evict_files()
+
+    def _evict_files(self):
+        while self.disk_bytes > self.max_bytes and self.files:
+            name, size = self.files.popitem(last=False)
+            self.disk_bytes -= size
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
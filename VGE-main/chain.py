@@ -0,0 +1,170 @@
+import predicates
+import vectorized
+from grid import SegmentGrid
+from point import Point
+
+# Candidatos a partir de los que compensa cruzarlos en lote con
+# vectorized.segment_intersections: armar el lote cuesta bastante más que una
+# llamada a orient2d, así que el umbral es más alto que VECTOR_THRESHOLD.
+_BATCH_THRESHOLD = 4 * vectorized.VECTOR_THRESHOLD
+
+def _side(ax, ay, bx, by, cx, cy):
+    o = predicates.orient2d(ax, ay, bx, by, cx, cy)
+    return (o > 0) - (o < 0)
+
+def _on_segment(ax, ay, bx, by, px, py):
+    # p ya es colineal con ab: alcanza con la caja envolvente
+    return min(ax, bx) <= px <= max(ax, bx) and min(ay, by) <= py <= max(ay, by)
+
+def segment_contact(ax, ay, bx, by, cx, cy, dx, dy):
+    """Un punto común de los segmentos ab y cd, o None si no se tocan.
+
+    Usa los predicados robustos, así que los contactos en un extremo y los
+    solapamientos colineales se detectan sin tolerancias."""
+    o1 = _side(ax, ay, bx, by, cx, cy)
+    o2 = _side(ax, ay, bx, by, dx, dy)
+    if o1 == 0 and o2 == 0:
+        for px, py, (sx, sy, tx, ty) in ((cx, cy, (ax, ay, bx, by)), (dx, dy, (ax, ay, bx, by)),
+                                         (ax, ay, (cx, cy, dx, dy)), (bx, by, (cx, cy, dx, dy))):
+            if _on_segment(sx, sy, tx, ty, px, py):
+                return Point(px, py)
+        return None
+    if o1 == o2:
+        return None
+    o3 = _side(cx, cy, dx, dy, ax, ay)
+    o4 = _side(cx, cy, dx, dy, bx, by)
+    if o3 == o4:
+        return None
+    if o1 == 0:
+        return Point(cx, cy)
+    if o2 == 0:
+        return Point(dx, dy)
+    if o3 == 0:
+        return Point(ax, ay)
+    if o4 == 0:
+        return Point(bx, by)
+    t = ((cx - ax) * (dy - cy) - (cy - ay) * (dx - cx)) / ((bx - ax) * (dy - cy) - (by - ay) * (dx - cx))
+    return Point(ax + t * (bx - ax), ay + t * (by - ay))
+
+class ChainValidator:
+    """Valida la cadena abierta de puntos a medida que se agregan.
+
+    Las aristas de la cadena se guardan en un SegmentGrid, así que cada
+    punto nuevo solo compara su arista y la de cierre tentativa (del punto
+    nuevo al primero) con las aristas de las celdas que atraviesan, en vez
+    de volver a revisar el polígono entero. Las aristas consecutivas pueden
+    compartir su vértice o solaparse (la limpieza de preprocess las une);
+    cualquier otro contacto es una intersección, igual que en sweepline.
+
+    Si `valid` es True, el polígono cerrado que forman los puntos no tiene
+    autointersecciones (tampoco después de limpiarlo), así que no hace
+    falta volver a barrerlo (con entradas degeneradas, como puntas que
+    vuelven sobre otra arista, puede ser más estricto que barrer el
+    polígono ya limpio). La grilla cubre la caja dada; los puntos de
+    afuera se siguen validando, solo que caen en las celdas del borde."""
+
+    def __init__(self, min_x, min_y, max_x, max_y, capacity=256):
+        self.bounds = (min_x, min_y, max_x, max_y)
+        self.capacity = capacity
+        self.reset()
+
+    def reset(self):
+        self.points = []
+        # cruces de las aristas ya agregadas (no desaparecen) y de la arista de cierre actual
+        self.intersections = []
+        self.closing = []
+        self.edges = SegmentGrid(*self.bounds, self.capacity)
+
+    @property
+    def valid(self):
+        return len(self.points) >= 3 and not self.intersections and not self.closing
+
+    def crossings(self):
+        """Intersecciones del polígono que se cerraría ahora"""
+        return self.intersections + self.closing
+
+    def _grow(self):
+        # la grilla se rehace con celdas más chicas cuando hay muchas más aristas de las previstas
+        self.capacity *= 4
+        self.edges = SegmentGrid(*self.bounds, self.capacity)
+        points = self.points
+        for i in range(len(points) - 1):
+            self.edges.insert_segment(i, points[i][0], points[i][1], points[i + 1][0], points[i + 1][1])
+
+    def _contacts(self, ax, ay, bx, by, skip):
+        """Contactos del segmento ab con las aristas de la cadena, salvo las de `skip`"""
+        points = self.points
+        min_x, max_x = min(ax, bx), max(ax, bx)
+        min_y, max_y = min(ay, by), max(ay, by)
+        candidates = []
+        for i in self.edges.query_segment(ax, ay, bx, by):
+            if i in skip:
+                continue
+            cx, cy = points[i][0], points[i][1]
+            dx, dy = points[i + 1][0], points[i + 1][1]
+            # descarte rápido por cajas envolventes antes de los predicados
+            if ((cx < min_x and dx < min_x) or (cx > max_x and dx > max_x)
+                    or (cy < min_y and dy < min_y) or (cy > max_y and dy > max_y)):
+                continue
+            candidates.append(i)
+        found = []
+        if len(candidates) >= _BATCH_THRESHOLD and vectorized.available():
+            # muchos candidatos (p. ej. la arista de cierre cruzando el polígono): los
+            # contactos se calculan en lote y solo los solapamientos colineales pasan por segment_contact
+            np = vectorized.np
+            mask, contacts = vectorized.segment_intersections(
+                np.array([(ax, ay)]), np.array([(bx, by)]),
+                np.array([(points[i][0], points[i][1]) for i in candidates]),
+                np.array([(points[i + 1][0], points[i + 1][1]) for i in candidates]))
+            overlapping = []
+            for k, (px, py) in zip(np.flatnonzero(mask[0]).tolist(), contacts[0, mask[0]].tolist()):
+                if px == px:
+                    found.append(Point(px, py))
+                else:
+                    overlapping.append(candidates[k])
+            candidates = overlapping
+        for i in candidates:
+            contact = segment_contact(ax, ay, bx, by, points[i][0], points[i][1], points[i + 1][0], points[i + 1][1])
+            if contact is not None:
+                found.append(contact)
+        return found
+
+    def _closing_contacts(self, x, y, new_edge):
+        # la arista de cierre va de (x, y) al primer punto y comparte un vértice con la 0 y con la nueva
+        if new_edge < 1:
+            return []
+        first = self.points[0]
+        return self._contacts(x, y, first[0], first[1], (0, new_edge))
+
+    def probe(self, x, y):
+        """Cruces que tendrían la arista al punto (x, y) y su arista de cierre, sin agregarlo"""
+        points = self.points
+        n = len(points)
+        if not n or (x, y) == (points[-1][0], points[-1][1]) or (x, y) == (points[0][0], points[0][1]):
+            return []
+        last = points[-1]
+        found = self._contacts(last[0], last[1], x, y, (n - 2,))
+        return found + self._closing_contacts(x, y, n - 1)
+
+    def append(self, p):
+        """Agrega el punto `p` y devuelve True, o False si repite el último o el primero.
+
+        Repetir el primero no agrega nada: el polígono se cierra solo."""
+        points = self.points
+        n = len(points)
+        x, y = p[0], p[1]
+        if n and ((x, y) == (points[-1][0], points[-1][1]) or (x, y) == (points[0][0], points[0][1])):
+            return False
+        if n:
+            last = points[-1]
+            self.intersections.extend(self._contacts(last[0], last[1], x, y, (n - 2,)))
+            self.edges.insert_segment(n - 1, last[0], last[1], x, y)
+        points.append(p)
+        if n > 2 * self.capacity:
+            self._grow()
+        self.closing = self._closing_contacts(x, y, n - 1)
+        return True
+
+    def extend(self, points):
+        for p in points:
+            self.append(p)
@@ -1,142 +1,372 @@
 import cairo
 import math
-from point import EPS, Point
-
-def parallel_anims(anims):
-    """Combina múltiples animaciones para que se ejecuten simultáneamente"""
-    def func(ctx, time):
-        for anim in anims:
-            anim(ctx, time)
-    return func
-
-def combine_anims(anims, timeline):
-    """Combina múltiples animaciones en una sola función de animación que se ejecuta secuencialmente según un timeline especificado."""
-    if len(anims) != len(timeline):
-        raise ValueError("anims y timeline deben de ser iguales")
-    
-    timeline_length = sum(timeline)
-    # prefijo sum
-    start_times = [sum(timeline[:i]) for i in range(len(timeline))]
-    end_times = [sum(timeline[:i+1]) for i in range(len(timeline))]
-    def func(ctx, time):
-        time = time * timeline_length
-        index = None
-        for i in range(len(start_times)):
-            if time >= start_times[i] and time <= end_times[i]:
-                index = i
-                break
-        if index is not None:
-            #Ejecuta las animaciones anteriores
-            for i in range(index):
-                anims[i](ctx, 1.0)
-            anims[index](ctx, (time - start_times[index])/timeline[index])
-        else:
-            # Ejecuta la animación actual con un time > 1
-            for anim in anims:
-                anim(ctx, 1.0)
-    return func
-
-def create_pause_anim():
-    """Crea una animación que no dibuja nada para que mostrar la animacion pausada"""
-    def func(ctx, time):
-        pass
-    return func
-
-def draw_polygon_segments(vertices):
-    """Dibuja el contorno de un polígono a partir de una lista de vértices.
-    args:
-        vertices - a arreglo de puntos"""
-    if len(vertices) < 1:
-        raise ValueError("Los vértices deben tener al menos un punto.")
-    def func(ctx):
-        vertex_iter = iter(vertices)
-        ctx.move_to(*next(vertex_iter))
-        for vertex in vertex_iter:
-            ctx.line_to(*vertex)
-        ctx.close_path()
-    return func
-
-def draw_polygon_segment(start, to):
-    """Dibuja una línea entre dos puntos. - start(inicial) y to(final)"""
-    def func(ctx):
-        ctx.move_to(*start)
-        ctx.line_to(*to)
-    return func
-
-def create_polygon_segment_anim(start, to):
-    """ Crea una animación que dibuja un segmento de polígono en un tiempo determinado."""
-    def func(ctx, time):
-        ctx.set_source_rgba(*rgba_to_bgra(0.5,0.5,0.5))
-        vec = Point(to.x - start.x, to.y - start.y)
-        target = Point(start.x + time * vec.x, start.y + time * vec.y)
-        ctx.move_to(*start)
-        ctx.line_to(*target)
-        ctx.stroke()
-    return func
-
-
-def draw_polygon_vertex(vertex, radius):
-    """Dibuja un vértice de polígono como un círculo."""
-    def func(ctx):
-        ctx.arc(*vertex, radius, 0, 2 * math.pi)
-    return func
-
-def create_polygon_vertex_anim(vertex, radius):
-    """Crea una animación que dibuja un círculo que resalta un vértice de polígono, con el radio aumentando progresivamente"""
-    def func(ctx, time):
-        curr_radius = radius * time
-        ctx.arc(*vertex, curr_radius, 0, 2 * math.pi)
-        ctx.fill()
-    return func
-
-def create_polygon_vertex_blink_anim(vertex, radius, color):
-    """ Crea una animación que dibuja un círculo que resalta un vértice de polígono, con el radio disminuyendo al final."""
-    def func(ctx, time):
-        ctx.set_source_rgba(*rgba_to_bgra(*color))
-        curr_radius = -4 * radius * (time * time - time)
-        ctx.arc(*vertex, curr_radius, 0, 2 * math.pi)
-        ctx.fill()
-    return func
-
-def draw_triangle(t):
-    """Dibuja un triángulo a partir de tres vértices. t = (v0, v1, v2)"""
-    def func(ctx):
-        v0, v1, v2 = t
-        ctx.move_to(v0.x, v0.y)
-        ctx.line_to(v1.x, v1.y)
-        ctx.line_to(v2.x, v2.y)
-        ctx.close_path()
-    return func
-
-def create_alpha_color_anim(red, green, blue, static_draw_f, fill=False, max_alpha=1.0, line_width=None):
-    """Crea una animación que cambia el canal alfa de un dibujo estático de manera lineal."""
-    def func(ctx: cairo.Context, time):
-        ctx.set_source_rgba(*rgba_to_bgra(red, green, blue, time*max_alpha))
-        static_draw_f(ctx)
-        if fill:
-            ctx.fill()
-        else:
-            if line_width is not None:
-                prev_line_width = ctx.get_line_width()
-                ctx.set_line_width(line_width)
-                ctx.stroke()
-                ctx.set_line_width(prev_line_width)
-            else:
-                ctx.stroke()
-    return func
-
-def create_alpha_color_blink_anim(red, green, blue, static_draw_f, fill=False):
-    """Crea una animación que cambia el canal alfa de un dibujo estático de manera intermitente (blink)."""
-    def func(ctx, time):
-        alpha = -4 * (time * time - time)
-        ctx.set_source_rgba(*rgba_to_bgra(red, green, blue, alpha))
-        static_draw_f(ctx)
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict, namedtuple
+
+# Primitivas de una lista de dibujo.
+POLYGON = 0  # contorno cerrado por los vértices
+SEGMENT = 1  # línea abierta por los vértices
+CIRCLE = 2   # círculo centrado en el único vértice
+
+# Efectos: cómo cambia una primitiva con el tiempo t en [0, 1] de su paso.
+FADE = 0   # alfa t * max_alpha
+BLINK = 1  # alfa -4 (t² - t): aparece y desaparece
+PULSE = 2  # radio -4 radius (t² - t) con alfa max_alpha: crece y se achica
+
+Style = namedtuple("Style", ["red", "green", "blue", "effect", "fill", "line_width", "radius", "max_alpha"],
+                   defaults=(FADE, False, None, 0, 1.0))
+Style.__doc__ = """Color, efecto y forma de pintar una primitiva.
+
+`line_width` None usa el ancho del contexto; `radius` es el de los círculos."""
+
+class Table:
+    """Valores distintos en orden de aparición; cada uno se guarda una sola vez y se referencia por índice"""
+
+    def __init__(self):
+        self.items = []
+        self.ids = {}
+
+    def index(self, item):
+        i = self.ids.get(item)
+        if i is None:
+            i = self.ids[item] = len(self.items)
+            self.items.append(item)
+        return i
+
+class DisplayList:
+    """Pasos de una animación como arreglos de primitivas, sin funciones por paso.
+
+    Cada paso tiene una duración y un rango de primitivas; cada primitiva,
+    un código (POLYGON, SEGMENT o CIRCLE), un estilo y un rango de índices
+    de vértices. Los vértices y los estilos se guardan una vez en `vertices`
+    y `styles` (dos Table, que pueden compartirse entre listas). Los pasos
+    se numeran desde el comienzo de la animación: `drop` descarta los
+    primeros sin renumerar los siguientes, así que la lista puede guardar
+    solo una ventana de pasos. Todo es serializable con pickle."""
+
+    def __init__(self, vertices=None, styles=None):
+        self.vertices = vertices if vertices is not None else Table()
+        self.styles = styles if styles is not None else Table()
+        # los arreglos de offsets guardan posiciones absolutas; first_* son las descartadas
+        self.first = 0
+        self.first_primitive = 0
+        self.first_index = 0
+        self.durations = array("d")
+        self.step_starts = array("q")
+        self.ops = array("B")
+        self.style_ids = array("H")
+        self.index_starts = array("q")
+        self.indices = array("I")
+
+    @property
+    def end(self):
+        """Índice del paso siguiente al último guardado"""
+        return self.first + len(self.durations)
+
+    def step(self, duration):
+        """Empieza un paso nuevo; las primitivas que se agreguen después le pertenecen"""
+        self.durations.append(duration)
+        self.step_starts.append(self.first_primitive + len(self.ops))
+
+    def add(self, op, style, points):
+        """Agrega una primitiva al último paso"""
+        self.ops.append(op)
+        self.style_ids.append(self.styles.index(style))
+        self.index_starts.append(self.first_index + len(self.indices))
+        vertex_index = self.vertices.index
+        self.indices.extend([vertex_index(p) for p in points])
+
+    def drop(self, step):
+        """Descarta los pasos anteriores a `step`"""
+        count = min(step, self.end) - self.first
+        if count <= 0:
+            return
+        primitive = self._primitive_start(count)
+        index = self._index_start(primitive)
+        del self.durations[:count]
+        del self.step_starts[:count]
+        del self.ops[:primitive]
+        del self.style_ids[:primitive]
+        del self.index_starts[:primitive]
+        del self.indices[:index]
+        self.first += count
+        self.first_primitive += primitive
+        self.first_index += index
+
+    def _primitive_start(self, local_step):
+        # primera primitiva (local) del paso local `local_step`, o el total si no hay tal paso
+        if local_step < len(self.step_starts):
+            return self.step_starts[local_step] - self.first_primitive
+        return len(self.ops)
+
+    def _index_start(self, primitive):
+        if primitive < len(self.index_starts):
+            return self.index_starts[primitive] - self.first_index
+        return len(self.indices)
+
+    def _path(self, ctx, primitive, radius):
+        points = self.vertices.items
+        indices = self.indices
+        op = self.ops[primitive]
+        start = self._index_start(primitive)
+        stop = self._index_start(primitive + 1)
+        if op == CIRCLE:
+            # sin subtrayecto nuevo, arc() uniría el círculo con el punto anterior del trayecto
+            ctx.new_sub_path()
+            ctx.arc(*points[indices[start]], radius, 0, 2 * math.pi)
+            return
+        ctx.move_to(*points[indices[start]])
+        for k in range(start + 1, stop):
+            ctx.line_to(*points[indices[k]])
+        if op == POLYGON:
+            ctx.close_path()
+
+    def _paint(self, ctx, fill, line_width):
         if fill:
             ctx.fill()
+        elif line_width is not None:
+            prev_line_width = ctx.get_line_width()
+            ctx.set_line_width(line_width)
+            ctx.stroke()
+            ctx.set_line_width(prev_line_width)
         else:
             ctx.stroke()
-    return func
 
+    def render_step(self, ctx, step, time):
+        """Dibuja el paso `step` en el instante `time` de [0, 1], primitiva por primitiva"""
+        local = step - self.first
+        styles = self.styles.items
+        style_ids = self.style_ids
+        for primitive in range(self._primitive_start(local), self._primitive_start(local + 1)):
+            style = styles[style_ids[primitive]]
+            radius = style.radius
+            if style.effect == FADE:
+                alpha = time * style.max_alpha
+            elif style.effect == BLINK:
+                alpha = -4 * (time * time - time) * style.max_alpha
+            else:
+                alpha = style.max_alpha
+                radius = -4 * radius * (time * time - time)
+            ctx.set_source_rgba(*rgba_to_bgra(style.red, style.green, style.blue, alpha))
+            self._path(ctx, primitive, radius)
+            self._paint(ctx, style.fill, style.line_width)
+
+    def render(self, ctx, first, last):
+        """Dibuja terminados los pasos [first, last), agrupando las primitivas en lotes.
+
+        Terminados, los parpadeos ya no se ven y se saltean. Las primitivas
+        opacas de un mismo color dan el mismo resultado en cualquier orden,
+        así que cada tramo de un color se pinta con un solo fill() y un
+        stroke() por ancho de línea; un color distinto o una primitiva
+        translúcida cierra el tramo, para respetar el orden de pintado."""
+        styles = self.styles.items
+        style_ids = self.style_ids
+        color = None
+        # (relleno, ancho de línea) -> primitivas del tramo actual
+        batches = {}
+        for primitive in range(self._primitive_start(first - self.first), self._primitive_start(last - self.first)):
+            style = styles[style_ids[primitive]]
+            if style.effect != FADE:
+                continue
+            if style.max_alpha < 1:
+                self._render_batches(ctx, color, batches)
+                color = None
+                batches = {}
+                ctx.set_source_rgba(*rgba_to_bgra(style.red, style.green, style.blue, style.max_alpha))
+                self._path(ctx, primitive, style.radius)
+                self._paint(ctx, style.fill, style.line_width)
+                continue
+            style_color = (style.red, style.green, style.blue)
+            if style_color != color:
+                self._render_batches(ctx, color, batches)
+                color = style_color
+                batches = {}
+            key = (True, None) if style.fill else (False, style.line_width)
+            batch = batches.get(key)
+            if batch is None:
+                batches[key] = [primitive]
+            else:
+                batch.append(primitive)
+        self._render_batches(ctx, color, batches)
+
+    def _render_batches(self, ctx, color, batches):
+        if not batches:
+            return
+        ctx.set_source_rgba(*rgba_to_bgra(*color))
+        styles = self.styles.items
+        style_ids = self.style_ids
+        for (fill, line_width), primitives in batches.items():
+            for primitive in primitives:
+                self._path(ctx, primitive, styles[style_ids[primitive]].radius)
+            self._paint(ctx, fill, line_width)
+
+class _Cursor:
+    """Posición dentro de una ejecución de `source` con los últimos `keep` pasos en una DisplayList"""
+
+    def __init__(self, source, vertices, styles, keep, block):
+        self.display = DisplayList(vertices, styles)
+        self.steps = iter(source(self.display))
+        self.keep = keep
+        self.block = block
+
+    def pull(self):
+        """Avanza hasta que haya pasos nuevos y devuelve sus duraciones, o None si no hay más"""
+        display = self.display
+        end = display.end
+        while display.end == end:
+            try:
+                next(self.steps)
+            except StopIteration:
+                return None
+        durations = display.durations[end - display.first:]
+        if display.end - display.first > self.keep + self.block:
+            # descarta de a bloques, nunca los pasos que acaban de llegar
+            display.drop(min(display.end - self.keep, end))
+        return durations
+
+class StepTimeline:
+    """Animación secuencial que se arma a medida que se reproduce.
+
+    `source` es una función que recibe una DisplayList y devuelve un
+    iterador nuevo que le agrega pasos (cada next() agrega cero o más). Se
+    llama con el tiempo absoluto (la suma de las duraciones) y solo se piden
+    pasos hasta el que contiene ese tiempo. Se guardan los tiempos de fin de
+    todos los pasos conocidos (un float por paso), pero solo las primitivas
+    de los `keep` pasos más recientes. El primer iterador de `source` es el
+    único que produce pasos nuevos; si la reproducción vuelve a un paso ya
+    descartado, se pide otro iterador y se avanza en él hasta ese paso.
+    Cada `checkpoint_every` pasos completados se guarda (bajo demanda) una
+    imagen con todo lo dibujado hasta ahí, de modo que cada cuadro solo
+    repite los pasos desde el último punto de control. Se conservan como
+    mucho `max_snapshots` imágenes, las usadas más recientemente."""
+
+    def __init__(self, source, checkpoint_every=32, max_snapshots=16, keep=4096):
+        self.source = source
+        self.checkpoint_every = checkpoint_every
+        self.max_snapshots = max_snapshots
+        self.keep = max(keep, 2 * checkpoint_every)
+        self.end_times = array("d")
+        self.done = False
+        # los vértices y estilos se comparten entre las ejecuciones de `source`
+        self.vertices = Table()
+        self.styles = Table()
+        self.leading = self._cursor()
+        self.replay = None
+        self.snapshots = OrderedDict()
+        self.snapshots_key = None
+
+    def _cursor(self):
+        return _Cursor(self.source, self.vertices, self.styles, self.keep, self.checkpoint_every)
+
+    @property
+    def length(self):
+        """Duración de los pasos conocidos hasta ahora (la total si `done`)"""
+        return self.end_times[-1] if self.end_times else 0.0
+
+    def extend(self, time):
+        """Pide pasos hasta conocer el que termina en o después de `time` (o hasta que no haya más)"""
+        while not self.done and (not self.end_times or self.end_times[-1] < time):
+            self._pull()
+
+    def complete(self):
+        """Pide todos los pasos y devuelve la duración total"""
+        self.extend(math.inf)
+        return self.length
+
+    def _pull(self):
+        durations = self.leading.pull()
+        if durations is None:
+            self.done = True
+            return
+        end_times = self.end_times
+        length = self.length
+        for duration in durations:
+            length += duration
+            end_times.append(length)
+
+    def _display(self, index, stop):
+        """DisplayList que contiene el paso `index` y, si cabe en su ventana, los siguientes hasta `stop`"""
+        leading = self.leading
+        if index >= leading.display.first:
+            # los pasos conocidos siempre están en la del iterador principal
+            return leading.display
+        replay = self.replay
+        if replay is None or index < replay.display.first:
+            replay = self.replay = self._cursor()
+        display = replay.display
+        while display.end <= index:
+            replay.pull()
+        while display.end < stop and display.end - display.first < self.keep and replay.pull() is not None:
+            pass
+        return display
+
+    def _draw_completed(self, ctx, first, last):
+        while first < last:
+            display = self._display(first, last)
+            stop = min(last, display.end)
+            display.render(ctx, first, stop)
+            first = stop
+
+    def _snapshot(self, ctx, checkpoint):
+        """Imagen con los pasos [0, checkpoint * checkpoint_every) ya dibujados, o None si no se puede cachear"""
+        target = ctx.get_target()
+        if not isinstance(target, cairo.ImageSurface):
+            return None
+        matrix = ctx.get_matrix()
+        key = (target.get_width(), target.get_height(), ctx.get_line_width(), ctx.get_antialias(),
+               (matrix.xx, matrix.yx, matrix.xy, matrix.yy, matrix.x0, matrix.y0))
+        snapshots = self.snapshots
+        if self.snapshots_key != key:
+            snapshots.clear()
+            self.snapshots_key = key
+        snapshot = snapshots.get(checkpoint)
+        if snapshot is not None:
+            snapshots.move_to_end(checkpoint)
+            return snapshot
+
+        # partir del punto de control anterior más cercano que esté en caché
+        base = max((c for c in snapshots if c < checkpoint), default=0)
+        snapshot = cairo.ImageSurface(cairo.FORMAT_ARGB32, key[0], key[1])
+        snap_ctx = cairo.Context(snapshot)
+        snap_ctx.set_antialias(key[3])
+        snap_ctx.set_line_width(key[2])
+        if base:
+            snap_ctx.set_source_surface(snapshots[base], 0, 0)
+            snap_ctx.paint()
+        snap_ctx.set_matrix(ctx.get_matrix())
+        self._draw_completed(snap_ctx, base * self.checkpoint_every, checkpoint * self.checkpoint_every)
+        snapshot.flush()
+
+        snapshots[checkpoint] = snapshot
+        if len(snapshots) > self.max_snapshots:
+            snapshots.popitem(last=False)
+        return snapshot
+
+    def __call__(self, ctx, time):
+        self.extend(time)
+        end_times = self.end_times
+        # primer paso que termina en o después de `time`
+        index = bisect_left(end_times, time)
+        completed = min(index, len(end_times))
+
+        first = 0
+        checkpoint = completed // self.checkpoint_every
+        if checkpoint > 0:
+            snapshot = self._snapshot(ctx, checkpoint)
+            if snapshot is not None:
+                ctx.save()
+                ctx.identity_matrix()
+                ctx.set_source_surface(snapshot, 0, 0)
+                ctx.paint()
+                ctx.restore()
+                first = checkpoint * self.checkpoint_every
+
+        #Ejecuta las animaciones anteriores
+        self._draw_completed(ctx, first, completed)
+        if index < len(end_times):
+            start = end_times[index - 1] if index else 0.0
+            self._display(index, index + 1).render_step(ctx, index, (time - start) / (end_times[index] - start))
 
 def rgba_to_bgra(red, green, blue, alpha=1.0):
     """Reordena los canales de color para la compatibilidad entre pycairo y pygame."""
@@ -0,0 +1,61 @@
+import math
+import os
+from multiprocessing import Pool, cpu_count
+
+import cairo
+
+from drawing import rgba_to_bgra
+from earclipping_anim import EarClippingAnim
+
+# Estado de cada proceso del pool: la animación no se puede serializar,
+# así que cada proceso la reconstruye una vez a partir de los vértices.
+_worker = {}
+
+def _init_worker(vertices, edge_swapping, width, height):
+    surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, width, height)
+    ctx = cairo.Context(surface)
+    ctx.set_antialias(cairo.Antialias(cairo.Antialias.GOOD))
+    _worker["anim"] = EarClippingAnim(vertices, edge_swapping=edge_swapping)
+    _worker["surface"] = surface
+    _worker["ctx"] = ctx
+
+def _render_frame(job):
+    """Dibuja un cuadro y lo guarda como PNG"""
+    time, path = job
+    surface = _worker["surface"]
+    ctx = _worker["ctx"]
+
+    ctx.set_source_rgba(*rgba_to_bgra(0, 0, 0, 1))
+    ctx.rectangle(0, 0, surface.get_width(), surface.get_height())
+    ctx.fill()
+    ctx.set_line_width(2)
+    _worker["anim"](ctx, time)
+    surface.flush()
+
+    # Los colores se dibujan en orden BGRA para pygame; para el PNG hay que
+    # volver a intercambiar los canales rojo y azul.
+    data = bytearray(surface.get_data())
+    data[0::4], data[2::4] = data[2::4], data[0::4]
+    frame = cairo.ImageSurface.create_for_data(data, cairo.FORMAT_ARGB32, surface.get_width(),
+                                               surface.get_height(), surface.get_stride())
+    frame.write_to_png(path)
+    return path
+
+def export_frames(vertices, out_dir, fps=60, edge_swapping=False, width=1000, height=600, workers=None):
+    """Renderiza la animación de EarClippingAnim a PNGs numerados en `out_dir`.
+
+    Los cuadros se muestrean a `fps` sobre la duración del plan (en segundos)
+    y se reparten en bloques contiguos entre un pool de procesos, de modo que
+    cada proceso aprovecha su caché de pasos completados. No necesita
+    pantalla. Devuelve la cantidad de cuadros escritos."""
+    os.makedirs(out_dir, exist_ok=True)
+    duration = EarClippingAnim(vertices, edge_swapping=edge_swapping).complete()
+    frame_count = max(1, math.ceil(duration * fps)) + 1
+    jobs = [(duration * i / (frame_count - 1), os.path.join(out_dir, f"frame_{i:06d}.png")) for i in range(frame_count)]
+
+    workers = workers or cpu_count()
+    chunksize = max(1, math.ceil(frame_count / (workers * 4)))
+    with Pool(workers, initializer=_init_worker, initargs=(vertices, edge_swapping, width, height)) as pool:
+        for _ in pool.imap_unordered(_render_frame, jobs, chunksize=chunksize):
+            pass
+    return frame_count
@@ -0,0 +1,230 @@
+import csv
+import json
+import re
+import struct
+
+# Lectores y escritores en streaming de colecciones de polígonos. Cada lector es
+# un generador de (id, anillos), donde anillos = [exterior, hueco, ...] y cada
+# anillo es una lista de tuplas (x, y) sin repetir el primer punto al final.
+
+BINARY_MAGIC = b"VGEP"
+TRIANGLES_MAGIC = b"VGET"
+
+_RECORD = struct.Struct("<QI")
+_COUNT = struct.Struct("<I")
+
+def _record_id(record_id):
+    """Id entero no negativo para los formatos binarios"""
+    if record_id < 0:
+        raise ValueError(f"id negativo en formato binario: {record_id}")
+    return record_id
+
+def _read_exact(f, size):
+    """Lee exactamente `size` bytes o lanza ValueError si el archivo está truncado"""
+    data = f.read(size)
+    if len(data) != size:
+        raise ValueError("archivo binario truncado")
+    return data
+
+def _open_ring(ring):
+    """Quita el punto de cierre si el anillo lo repite"""
+    if len(ring) > 1 and ring[0] == ring[-1]:
+        ring = ring[:-1]
+    return ring
+
+def _parse_wkt_rings(body):
+    rings = []
+    for ring_text in re.findall(r"\(([^()]*)\)", body):
+        ring = []
+        for pair in ring_text.split(","):
+            x, y = pair.split()[:2]
+            ring.append((float(x), float(y)))
+        rings.append(_open_ring(ring))
+    return rings
+
+def read_wkt(path):
+    """Un POLYGON o MULTIPOLYGON WKT por línea; opcionalmente `id;WKT`"""
+    with open(path) as f:
+        for line_number, line in enumerate(f):
+            line = line.strip()
+            if not line:
+                continue
+            record_id = line_number
+            if ";" in line:
+                record_id, line = line.split(";", 1)
+            kind, _, body = line.partition("(")
+            kind = kind.strip().upper()
+            if kind == "POLYGON":
+                yield record_id, _parse_wkt_rings(body)
+            elif kind == "MULTIPOLYGON":
+                for k, part in enumerate(re.findall(r"\(\s*(\([^()]*\)(?:\s*,\s*\([^()]*\))*)\s*\)", "(" + body)):
+                    yield f"{record_id}:{k}", _parse_wkt_rings(part)
+            else:
+                raise ValueError(f"línea {line_number + 1}: geometría WKT no soportada: {kind}")
+
+def _coordinates(record_id, obj):
+    if "coordinates" not in obj:
+        raise ValueError(f"polígono {record_id}: geometría GeoJSON sin coordenadas")
+    return obj["coordinates"]
+
+def _geojson_polygons(record_id, obj):
+    if obj.get("type") == "Feature":
+        record_id = obj.get("id", record_id)
+        obj = obj.get("geometry") or {}
+    kind = obj.get("type")
+    if kind == "Polygon":
+        yield record_id, [_open_ring([tuple(p[:2]) for p in ring]) for ring in _coordinates(record_id, obj)]
+    elif kind == "MultiPolygon":
+        for k, polygon in enumerate(_coordinates(record_id, obj)):
+            yield f"{record_id}:{k}", [_open_ring([tuple(p[:2]) for p in ring]) for ring in polygon]
+    elif kind == "GeometryCollection":
+        if "geometries" not in obj:
+            raise ValueError(f"polígono {record_id}: GeometryCollection sin geometrías")
+        for k, geometry in enumerate(obj["geometries"]):
+            yield from _geojson_polygons(f"{record_id}:{k}", geometry)
+
+def _iter_json_array(f, chunk_size=1 << 20):
+    """Decodifica uno a uno los elementos del arreglo "features" sin cargar el archivo entero"""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    while True:
+        match = re.search(r'"features"\s*:\s*\[', buffer)
+        if match:
+            buffer = buffer[match.end():]
+            break
+        chunk = f.read(chunk_size)
+        if not chunk:
+            return
+        buffer = buffer[-64:] + chunk
+    position = 0
+    while True:
+        while position < len(buffer) and buffer[position] in " \t\r\n,":
+            position += 1
+        if position < len(buffer) and buffer[position] == "]":
+            return
+        try:
+            obj, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                raise
+            buffer = buffer[position:] + chunk
+            position = 0
+            continue
+        yield obj
+        buffer = buffer[end:]
+        position = 0
+
+def read_geojson(path):
+    """FeatureCollection (se decodifica feature por feature) o GeoJSON delimitado por líneas"""
+    with open(path) as f:
+        start = f.read(1 << 12)
+        f.seek(0)
+        if '"FeatureCollection"' in start or '"features"' in start:
+            for k, feature in enumerate(_iter_json_array(f)):
+                yield from _geojson_polygons(k, feature)
+        else:
+            for k, line in enumerate(f):
+                line = line.strip().lstrip("\x1e")
+                if line:
+                    yield from _geojson_polygons(k, json.loads(line))
+
+def read_csv(path):
+    """Filas `id,x,y[,anillo]`; las filas consecutivas con el mismo id forman un polígono"""
+    with open(path, newline="") as f:
+        current_id = None
+        rings = {}
+        reader = csv.reader(f)
+        for row in reader:
+            if not row or row[0].startswith("#"):
+                continue
+            if len(row) < 3:
+                raise ValueError(f"línea {reader.line_num}: se esperaban al menos 3 columnas id,x,y")
+            try:
+                x, y = float(row[1]), float(row[2])
+            except ValueError:
+                continue # cabecera
+            ring = int(row[3]) if len(row) > 3 and row[3] else 0
+            if row[0] != current_id:
+                if current_id is not None:
+                    yield current_id, [_open_ring(rings[k]) for k in sorted(rings)]
+                current_id = row[0]
+                rings = {}
+            rings.setdefault(ring, []).append((x, y))
+        if current_id is not None:
+            yield current_id, [_open_ring(rings[k]) for k in sorted(rings)]
+
+def read_binary(path):
+    """Formato binario compacto: BINARY_MAGIC y registros
+    <u64 id><u32 anillos> y por anillo <u32 n> seguido de n pares float64 (little-endian)"""
+    with open(path, "rb") as f:
+        if f.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+            raise ValueError(f"{path} no es un archivo binario de polígonos")
+        while True:
+            header = f.read(_RECORD.size)
+            if not header:
+                return
+            if len(header) != _RECORD.size:
+                raise ValueError("archivo binario truncado")
+            record_id, ring_count = _RECORD.unpack(header)
+            rings = []
+            for _ in range(ring_count):
+                (n,) = _COUNT.unpack(_read_exact(f, _COUNT.size))
+                values = struct.unpack(f"<{2 * n}d", _read_exact(f, 16 * n))
+                rings.append(list(zip(values[0::2], values[1::2])))
+            yield record_id, rings
+
+def write_binary(path, records):
+    """Escribe (id entero, anillos) en el formato que lee read_binary"""
+    with open(path, "wb") as f:
+        f.write(BINARY_MAGIC)
+        for record_id, rings in records:
+            f.write(_RECORD.pack(_record_id(int(record_id)), len(rings)))
+            for ring in rings:
+                f.write(_COUNT.pack(len(ring)))
+                f.write(struct.pack(f"<{2 * len(ring)}d", *(c for p in ring for c in p)))
+
+READERS = {
+    "wkt": read_wkt,
+    "geojson": read_geojson,
+    "csv": read_csv,
+    "bin": read_binary,
+}
+
+EXTENSIONS = {
+    ".wkt": "wkt",
+    ".txt": "wkt",
+    ".geojson": "geojson",
+    ".json": "geojson",
+    ".geojsonl": "geojson",
+    ".ndjson": "geojson",
+    ".csv": "csv",
+    ".bin": "bin",
+}
+
+class TextTriangleWriter:
+    """Una línea por polígono: `id<TAB>a b c;a b c;...` con índices sobre sus vértices"""
+
+    def __init__(self, f):
+        self.f = f
+
+    def write(self, record_id, triangles):
+        self.f.write(f"{record_id}\t" + ";".join(f"{a} {b} {c}" for a, b, c in triangles) + "\n")
+
+class BinaryTriangleWriter:
+    """TRIANGLES_MAGIC y registros <u64 id><u32 triángulos> seguidos de 3 u32 por triángulo.
+    Los ids no enteros se guardan por su posición en la entrada; los negativos lanzan ValueError."""
+
+    def __init__(self, f):
+        self.f = f
+        self.f.write(TRIANGLES_MAGIC)
+        self.count = 0
+
+    def write(self, record_id, triangles):
+        try:
+            record_id = int(record_id)
+        except (TypeError, ValueError):
+            record_id = self.count
+        self.count += 1
+        self.f.write(_RECORD.pack(_record_id(record_id), len(triangles)))
+        self.f.write(struct.pack(f"<{3 * len(triangles)}I", *(i for t in triangles for i in t)))
@@ -0,0 +1,358 @@
+import math
+from bisect import bisect_left, bisect_right, insort
+
+class _UniformGrid:
+    """Celdas cuadradas sobre una caja, con del orden de un elemento por celda en promedio.
+
+    Las celdas se guardan con una clave entera cx * rows + cy; las
+    coordenadas fuera de la caja caen en las celdas del borde."""
+
+    def __init__(self, min_x, min_y, max_x, max_y, item_count):
+        width = max_x - min_x
+        height = max_y - min_y
+        area = width * height
+        if area > 0:
+            cell_size = math.sqrt(area / max(item_count, 1))
+        else:
+            cell_size = max(width, height) / max(item_count, 1)
+        self.cell_size = cell_size if cell_size > 0 else 1.0
+        self.inv_cell_size = 1.0 / self.cell_size
+        self.min_x = min_x
+        self.min_y = min_y
+        self.max_x = max_x
+        self.max_y = max_y
+        self.rows = int(height * self.inv_cell_size) + 1
+        self.last_column = int(width * self.inv_cell_size)
+        self.cells = {}
+
+    def _column(self, x):
+        cx = int((x - self.min_x) * self.inv_cell_size)
+        if cx < 0:
+            return 0
+        if cx > self.last_column:
+            return self.last_column
+        return cx
+
+    def _row(self, y):
+        cy = int((y - self.min_y) * self.inv_cell_size)
+        if cy < 0:
+            return 0
+        if cy >= self.rows:
+            return self.rows - 1
+        return cy
+
+    def _convex_spans(self, points, columns=None):
+        """(columna, primera fila, última fila) de cada columna que toca un polígono convexo.
+
+        El corte de un convexo con una columna es un solo tramo vertical, así
+        que un triángulo largo y fino recorre muchas menos celdas que su caja.
+        Con `columns` (una lista ordenada) solo se recorren esas columnas."""
+        edges = []
+        for (px, py), (qx, qy) in zip(points, points[1:] + points[:1]):
+            if px > qx:
+                px, py, qx, qy = qx, qy, px, py
+            edges.append((px, py, qx, qy, (qy - py) / (qx - px) if qx > px else 0.0))
+        cx0 = self._column(min(edge[0] for edge in edges))
+        cx1 = self._column(max(edge[2] for edge in edges))
+        if columns is None:
+            columns = range(cx0, cx1 + 1)
+        else:
+            columns = columns[bisect_left(columns, cx0):bisect_right(columns, cx1)]
+        # margen para que el redondeo no deje afuera una fila en el borde
+        margin = self.cell_size * 1e-9
+        for cx in columns:
+            # las columnas de los extremos incluyen lo que quede fuera de la caja
+            left = -math.inf if cx == cx0 else self.min_x + cx * self.cell_size
+            right = math.inf if cx == cx1 else self.min_x + (cx + 1) * self.cell_size
+            low = math.inf
+            high = -math.inf
+            for px, py, qx, qy, slope in edges:
+                if qx < left or px > right:
+                    continue
+                ya = py + (left - px) * slope if px < left else py
+                yb = qy - (qx - right) * slope if qx > right else qy
+                if ya > yb:
+                    ya, yb = yb, ya
+                if ya < low:
+                    low = ya
+                if yb > high:
+                    high = yb
+            if low <= high:
+                yield cx, self._row(low - margin), self._row(high + margin)
+
+class PointGrid(_UniformGrid):
+    """Índice espacial uniforme (cubetas hash) de elementos con coordenadas.
+
+    `position` extrae el punto (x, y) de cada elemento. Las celdas se eligen
+    para que, en promedio, haya del orden de un elemento por celda. Además
+    de las celdas se guardan, ordenadas, las columnas ocupadas y las filas
+    ocupadas de cada una: una consulta solo recorre celdas con elementos,
+    así que una caja grande no cuesta más que las celdas ocupadas que toca."""
+
+    def __init__(self, min_x, min_y, max_x, max_y, item_count, position=lambda item: item):
+        super().__init__(min_x, min_y, max_x, max_y, item_count)
+        self.position = position
+        self.size = 0
+        self.columns = []
+        self.column_rows = {}
+
+    def _cell(self, item):
+        x, y = self.position(item)
+        return self._column(x), self._row(y)
+
+    def insert(self, item):
+        cx, cy = self._cell(item)
+        key = cx * self.rows + cy
+        cell = self.cells.get(key)
+        if cell is None:
+            self.cells[key] = [item]
+            rows = self.column_rows.get(cx)
+            if rows is None:
+                insort(self.columns, cx)
+                self.column_rows[cx] = [cy]
+            else:
+                insort(rows, cy)
+        else:
+            cell.append(item)
+        self.size += 1
+
+    def remove(self, item):
+        cx, cy = self._cell(item)
+        key = cx * self.rows + cy
+        cell = self.cells.get(key)
+        if cell is not None and item in cell:
+            cell.remove(item)
+            if not cell:
+                del self.cells[key]
+                rows = self.column_rows[cx]
+                del rows[bisect_left(rows, cy)]
+                if not rows:
+                    del self.column_rows[cx]
+                    del self.columns[bisect_left(self.columns, cx)]
+            self.size -= 1
+
+    @classmethod
+    def fitted(cls, items, position, max_occupancy=2, max_cells=4):
+        """Grilla sobre la caja de `items` con celdas ajustadas a cómo se reparten.
+
+        El tamaño inicial supone los elementos repartidos por toda la caja; si
+        se concentran (sobre una recta o un borde, por ejemplo) las celdas
+        ocupadas tienen muchos más, así que se achican hasta que en promedio
+        no pasen de `max_occupancy`. Las celdas vacías no ocupan lugar ni se
+        recorren."""
+        items = list(items)
+        points = [position(item) for item in items]
+        if not points:
+            return cls(0, 0, 0, 0, 0, position)
+        bounds = (min(p[0] for p in points), min(p[1] for p in points),
+                  max(p[0] for p in points), max(p[1] for p in points))
+        grid = cls(*bounds, len(items), position)
+        # sin pasar de `max_cells` celdas por elemento contando las vacías: con
+        # celdas mucho más chicas que la caja, un triángulo que la cruza
+        # recorrería demasiadas columnas
+        min_cell_size = math.sqrt((bounds[2] - bounds[0]) * (bounds[3] - bounds[1]) / (max_cells * len(items)))
+        for _ in range(8):
+            column = grid._column
+            row = grid._row
+            rows = grid.rows
+            occupied = len({column(x) * rows + row(y) for x, y in points})
+            occupancy = len(points) / occupied
+            if occupancy <= max_occupancy or grid.cell_size <= min_cell_size:
+                break
+            grid._resize(max(grid.cell_size / math.sqrt(occupancy), min_cell_size))
+        for item in items:
+            grid.insert(item)
+        return grid
+
+    def _resize(self, cell_size):
+        self.cell_size = cell_size
+        self.inv_cell_size = 1.0 / cell_size
+        self.rows = int((self.max_y - self.min_y) * self.inv_cell_size) + 1
+        self.last_column = int((self.max_x - self.min_x) * self.inv_cell_size)
+
+    def query(self, min_x, min_y, max_x, max_y):
+        """Devuelve los elementos cuyas celdas intersecan la caja dada"""
+        cx0 = self._column(min_x)
+        cy0 = self._row(min_y)
+        cx1 = self._column(max_x)
+        cy1 = self._row(max_y)
+        cells = self.cells
+        columns = self.columns
+        found = []
+        for cx in columns[bisect_left(columns, cx0):bisect_right(columns, cx1)]:
+            base = cx * self.rows
+            rows = self.column_rows[cx]
+            for cy in rows[bisect_left(rows, cy0):bisect_right(rows, cy1)]:
+                found.extend(cells[base + cy])
+        return found
+
+    def query_triangle(self, a, b, c):
+        """Celdas no vacías (listas de elementos) que toca el triángulo abc, de a una.
+
+        Quien busca un solo elemento puede detenerse en la primera celda que
+        lo tenga. Solo se calcula el tramo de filas de las columnas ocupadas
+        dentro de la caja del triángulo, así que uno grande no recorre las
+        celdas vacías que cubre."""
+        if not self.cells:
+            return
+        (x0, y0), (x1, y1), (x2, y2) = sorted((a, b, c))
+        min_x = self.min_x
+        min_y = self.min_y
+        cell_size = self.cell_size
+        inv = self.inv_cell_size
+        last_row = self.rows - 1
+        columns = self.columns
+        first = self._column(x0)
+        last = self._column(x2)
+        visited = columns[bisect_left(columns, first):bisect_right(columns, last)]
+        if not visited:
+            return
+        # el lado largo x0 -> x2 por un lado y la cadena x0 -> x1 -> x2 por el otro
+        long_slope = (y2 - y0) / (x2 - x0) if x2 > x0 else 0.0
+        slope01 = (y1 - y0) / (x1 - x0) if x1 > x0 else 0.0
+        slope12 = (y2 - y1) / (x2 - x1) if x2 > x1 else 0.0
+        # el vértice del medio cuenta en su columna; sobre una vertical, también el de arriba
+        middle = (y1, y2) if x2 == x0 else (y1,)
+        # margen para que el redondeo no deje afuera una fila en el borde
+        margin = cell_size * 1e-9
+        cells = self.cells
+        column_rows = self.column_rows
+        rows = self.rows
+        for cx in visited:
+            # las columnas de los extremos incluyen lo que quede fuera de la caja
+            left = x0 if cx == first else max(min_x + cx * cell_size, x0)
+            right = x2 if cx == last else min(min_x + (cx + 1) * cell_size, x2)
+            ya = y0 + (left - x0) * long_slope
+            yb = y0 + (right - x0) * long_slope
+            yc = y0 + (left - x0) * slope01 if left <= x1 else y1 + (left - x1) * slope12
+            yd = y0 + (right - x0) * slope01 if right <= x1 else y1 + (right - x1) * slope12
+            low, high = (ya, yb) if ya < yb else (yb, ya)
+            for y in (yc, yd, *middle) if left <= x1 <= right else (yc, yd):
+                if y < low:
+                    low = y
+                elif y > high:
+                    high = y
+            cy0 = int((low - margin - min_y) * inv)
+            cy1 = int((high + margin - min_y) * inv)
+            cy0 = 0 if cy0 < 0 else last_row if cy0 > last_row else cy0
+            cy1 = 0 if cy1 < 0 else last_row if cy1 > last_row else cy1
+            occupied = column_rows[cx]
+            base = cx * rows
+            for cy in occupied[bisect_left(occupied, cy0):bisect_right(occupied, cy1)]:
+                yield cells[base + cy]
+
+    def __len__(self):
+        return self.size
+
+class SegmentGrid(_UniformGrid):
+    """Índice espacial uniforme de segmentos.
+
+    Cada segmento se registra en todas las celdas que cubre su caja
+    envolvente. Además de la consulta por caja permite recorrer las celdas
+    de una fila hacia +x, para lanzar rayos horizontales."""
+
+    def _keys(self, x0, y0, x1, y1):
+        rows = self.rows
+        cy0 = self._row(min(y0, y1))
+        cy1 = self._row(max(y0, y1))
+        for cx in range(self._column(min(x0, x1)), self._column(max(x0, x1)) + 1):
+            base = cx * rows
+            for cy in range(cy0, cy1 + 1):
+                yield base + cy
+
+    def insert(self, item, x0, y0, x1, y1):
+        for key in self._keys(x0, y0, x1, y1):
+            cell = self.cells.get(key)
+            if cell is None:
+                self.cells[key] = [item]
+            else:
+                cell.append(item)
+
+    def remove(self, item, x0, y0, x1, y1):
+        for key in self._keys(x0, y0, x1, y1):
+            cell = self.cells.get(key)
+            if cell is not None and item in cell:
+                cell.remove(item)
+                if not cell:
+                    del self.cells[key]
+
+    def _segment_keys(self, x0, y0, x1, y1):
+        # solo las celdas que atraviesa el segmento, columna por columna
+        if x0 > x1:
+            x0, y0, x1, y1 = x1, y1, x0, y0
+        cx0 = self._column(x0)
+        cx1 = self._column(x1)
+        if cx0 == cx1 or y0 == y1:
+            yield from self._keys(x0, y0, x1, y1)
+            return
+        slope = (y1 - y0) / (x1 - x0)
+        # margen para que el redondeo no deje afuera una fila en el borde
+        margin = self.cell_size * 1e-9
+        rows = self.rows
+        for cx in range(cx0, cx1 + 1):
+            # las columnas de los extremos incluyen lo que quede fuera de la caja
+            left = x0 if cx == cx0 else self.min_x + cx * self.cell_size
+            right = x1 if cx == cx1 else self.min_x + (cx + 1) * self.cell_size
+            ya = y0 + (left - x0) * slope
+            yb = y0 + (right - x0) * slope
+            base = cx * rows
+            for cy in range(self._row(min(ya, yb) - margin), self._row(max(ya, yb) + margin) + 1):
+                yield base + cy
+
+    def _convex_keys(self, points):
+        rows = self.rows
+        for cx, cy0, cy1 in self._convex_spans(points):
+            base = cx * rows
+            for cy in range(cy0, cy1 + 1):
+                yield base + cy
+
+    def insert_convex(self, item, points):
+        """Registra un polígono convexo (un triángulo, por ejemplo) solo en las celdas que toca"""
+        for key in self._convex_keys(list(points)):
+            cell = self.cells.get(key)
+            if cell is None:
+                self.cells[key] = [item]
+            else:
+                cell.append(item)
+
+    def insert_segment(self, item, x0, y0, x1, y1):
+        """Como insert, pero registra el segmento solo en las celdas que atraviesa"""
+        for key in self._segment_keys(x0, y0, x1, y1):
+            cell = self.cells.get(key)
+            if cell is None:
+                self.cells[key] = [item]
+            else:
+                cell.append(item)
+
+    def query_segment(self, x0, y0, x1, y1):
+        """Segmentos que comparten alguna celda con el segmento dado (sin repetir).
+
+        Si se insertaron con insert_segment, la consulta de un segmento largo
+        cuesta lo que las celdas que atraviesa y no lo que su caja envolvente."""
+        found = {}
+        for key in self._segment_keys(x0, y0, x1, y1):
+            cell = self.cells.get(key)
+            if cell:
+                found.update(dict.fromkeys(cell))
+        return list(found)
+
+    def query(self, min_x, min_y, max_x, max_y):
+        """Segmentos cuyas celdas intersecan la caja dada (sin repetir)"""
+        found = {}
+        for key in self._keys(min_x, min_y, max_x, max_y):
+            cell = self.cells.get(key)
+            if cell:
+                found.update(dict.fromkeys(cell))
+        return list(found)
+
+    def ray_cells(self, x, y):
+        """Celdas de la fila de y desde la columna de x hacia +x.
+
+        Produce (borde derecho de la celda, segmentos); quien lanza el rayo
+        puede detenerse en cuanto su mejor corte queda antes de ese borde."""
+        cy = self._row(y)
+        rows = self.rows
+        cells = self.cells
+        for cx in range(self._column(x), self.last_column + 1):
+            cell = cells.get(cx * rows + cy)
+            yield self.min_x + (cx + 1) * self.cell_size, cell or ()
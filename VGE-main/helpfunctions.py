@@ -1,47 +1,39 @@
 import point
+import predicates
+import preprocess
+import sweepline
 
 def find_intersection(x1,y1,x2,y2,x3,y3,x4,y4):
-  try:
-      uA = ((x4-x3)*(y1-y3) - (y4-y3)*(x1-x3)) / ((y4-y3)*(x2-x1) - (x4-x3)*(y2-y1))
-      uB = ((x2-x1)*(y1-y3) - (y2-y1)*(x1-x3)) / ((y4-y3)*(x2-x1) - (x4-x3)*(y2-y1))
-  except:
+  d = (y4-y3)*(x2-x1) - (x4-x3)*(y2-y1)
+  if d == 0: # segmentos paralelos
       return None
+  uA = ((x4-x3)*(y1-y3) - (y4-y3)*(x1-x3)) / d
+  uB = ((x2-x1)*(y1-y3) - (y2-y1)*(x1-x3)) / d
   if (uA >= 0 and uA <= 1 and uB >= 0 and uB <= 1):
       intersectionX = x1 + (uA * (x2-x1))
       intersectionY = y1 + (uA * (y2-y1))
       return point.Point(intersectionX, intersectionY)
   return None
 
-def check_intersections(polygon):
-    poly = polygon[:]
-    poly.append(polygon[0])
-    tmp = poly[:]
-    intersections = []
-    for l1, l2 in zip(poly, poly[1:]):
-        tmp = tmp[1:]
-        for n1,n2 in zip(tmp,tmp[1:]):
-            ret = find_intersection(l1[0],l1[1],l2[0],l2[1],n1[0],n1[1],n2[0],n2[1])
-            if ret and (ret != l2) and (ret != l1):
-                intersections.append(ret)
-    return intersections
+def check_intersections(polygon, first_only=False, holes=None):
+    """Puntos de autointersección del polígono (barrido de Bentley–Ottmann),
+    incluidos los cruces entre el exterior y los `holes` o entre huecos.
+    Con first_only=True se detiene en el primero, suficiente para validar."""
+    return sweepline.find_intersections(polygon, first_only=first_only, holes=holes)
 
 def collinear(x1, y1, x2, y2, x3, y3): 
-    a = x1 * (y2 - y3) + x2 * (y3 - y1) + x3 * (y1 - y2)
-    return (a==0)
+    return predicates.collinear(x1, y1, x2, y2, x3, y3)
 
 def check_points_on_line(polygon):
-    pts = []
-    poly = polygon[:]
-    poly.append(polygon[0])
-    for p1, p2, p3 in zip(poly, poly[1:], poly[2:]):
-        if(collinear(p1[0],p1[1],p2[0],p2[1],p3[0],p3[1])):
-            pts.append(p2)    
-    out = []
-    for p in polygon:
-        if p not in pts:
-            out.append(p)
-            
-    return out,pts
+    """Devuelve (vértices restantes, vértices quitados) tras quitar repetidos y colineales.
+
+    Es preprocess.clean_ring: la limpieza se repite hasta que no queda
+    ningún vértice colineal, en tiempo lineal."""
+    kept = preprocess.clean_ring(polygon)
+    keep = bytearray(len(polygon))
+    for i in kept:
+        keep[i] = 1
+    return [polygon[i] for i in kept], [p for i, p in enumerate(polygon) if not keep[i]]
 
 def rotate_list(l, shift):
     n = []
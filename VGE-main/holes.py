@@ -0,0 +1,227 @@
+import math
+
+import predicates
+from grid import PointGrid, SegmentGrid
+
+class _Bridging:
+    """Une los huecos al anillo exterior con aristas puente (método de Eberly).
+
+    Trabaja sobre "ranuras": cada vértice de entrada es una ranura y cada
+    puente duplica sus dos extremos en ranuras nuevas. `source` guarda, para
+    cada ranura, el índice del vértice de entrada que repite (exterior
+    primero, después los huecos en orden)."""
+
+    def __init__(self, outer, holes):
+        self.xs = []
+        self.ys = []
+        rings = []
+        for ring in [outer] + list(holes):
+            if len(ring) < 3:
+                raise ValueError("vertices should have at least 3 items")
+            start = len(self.xs)
+            self.xs.extend(p[0] for p in ring)
+            self.ys.extend(p[1] for p in ring)
+            rings.append(list(range(start, len(self.xs))))
+        n = len(self.xs)
+        self.source = list(range(n))
+        self.copies = {}
+        self.prev = [0] * n
+        self.next = [0] * n
+
+        # Mismo criterio que EarClipping._is_clockwise: el exterior con criterio
+        # positivo y los huecos al revés, para que el anillo unido quede orientado.
+        for k, ring in enumerate(rings):
+            criterion = self._criterion(ring)
+            if (criterion <= 0) if k == 0 else (criterion > 0):
+                ring.reverse()
+            for a, b in zip(ring, ring[1:] + ring[:1]):
+                self.next[a] = b
+                self.prev[b] = a
+        self.outer = rings[0]
+        self.holes = rings[1:]
+
+        xs = self.xs
+        ys = self.ys
+        # ranuras del anillo unido (para elegir el extremo del puente) y sus aristas
+        # (para el rayo); dos puentes por hueco
+        bounds = (min(xs), min(ys), max(xs), max(ys))
+        self.points = PointGrid(*bounds, n + 2 * len(self.holes), position=lambda s: (xs[s], ys[s]))
+        self.edges = SegmentGrid(*bounds, n + 2 * len(self.holes))
+        # Las aristas del índice tienen un identificador fijo; al unir un hueco la
+        # arista que salía de un extremo pasa a salir de su copia sin reindexarla.
+        self.edge_start = []
+        self.edge_of = [None] * n
+        for s in self.outer:
+            self.points.insert(s)
+            self._add_edge(s)
+
+    def _add_edge(self, s):
+        xs = self.xs
+        ys = self.ys
+        t = self.next[s]
+        e = len(self.edge_start)
+        self.edge_start.append(s)
+        self.edge_of[s] = e
+        self.edges.insert(e, xs[s], ys[s], xs[t], ys[t])
+
+    def _criterion(self, ring):
+        xs = self.xs
+        ys = self.ys
+        criterion = 0
+        for a, b in zip(ring, ring[1:] + ring[:1]):
+            criterion += (xs[b] - xs[a]) * (ys[b] + ys[a])
+        return criterion
+
+    def _orient(self, a, b, c):
+        xs = self.xs
+        ys = self.ys
+        return predicates.orient2d(xs[a], ys[a], xs[b], ys[b], xs[c], ys[c])
+
+    def merge(self):
+        """Une todos los huecos y devuelve (vértices del anillo unido, source de cada uno)"""
+        xs = self.xs
+        ys = self.ys
+        rightmost = [max(hole, key=lambda s: (xs[s], -ys[s])) for hole in self.holes]
+        # de derecha a izquierda: el puente de cada hueco solo ve lo ya unido
+        for k in sorted(range(len(self.holes)), key=lambda k: -xs[rightmost[k]]):
+            m = rightmost[k]
+            self._bridge(self._find_bridge_vertex(m), m, self.holes[k])
+
+        out = []
+        source = []
+        s = self.outer[0]
+        while True:
+            out.append((xs[s], ys[s]))
+            source.append(self.source[s])
+            s = self.next[s]
+            if s == self.outer[0]:
+                break
+        return out, source
+
+    def _find_bridge_vertex(self, m):
+        """Ranura del anillo unido visible desde la ranura m del hueco"""
+        xs = self.xs
+        ys = self.ys
+        next = self.next
+        mx = xs[m]
+        my = ys[m]
+
+        # Rayo hacia +x: la arista más cercana que lo corta y deja a m en su lado interior.
+        hit = None
+        hit_x = math.inf
+        edge_start = self.edge_start
+        for cell_end, cell in self.edges.ray_cells(mx, my):
+            for e in cell:
+                s = edge_start[e]
+                t = next[s]
+                y0 = ys[s]
+                y1 = ys[t]
+                if y0 == y1 or not (min(y0, y1) <= my <= max(y0, y1)):
+                    continue
+                if self._orient(s, t, m) >= 0:
+                    continue
+                x = xs[s] + (my - y0) * (xs[t] - xs[s]) / (y1 - y0)
+                if mx <= x < hit_x:
+                    hit_x = x
+                    hit = s
+            if hit_x <= cell_end:
+                break
+        if hit is None:
+            raise ValueError("el hueco no está dentro del polígono exterior")
+
+        t = next[hit]
+        if xs[hit] == hit_x and ys[hit] == my:
+            return self._pick_copy(hit, m)
+        if xs[t] == hit_x and ys[t] == my:
+            return self._pick_copy(t, m)
+        p = hit if xs[hit] > xs[t] else t
+
+        # Si algún vértice cae en el triángulo (m, corte, p), el visible es el de
+        # menor ángulo con el rayo (y, a igual ángulo, el más cercano).
+        px = xs[p]
+        py = ys[p]
+        best = p
+        best_key = None
+        for r in self.points.query(min(mx, px), min(my, py), max(hit_x, px), max(my, py)):
+            rx = xs[r]
+            ry = ys[r]
+            if rx <= mx or (rx == px and ry == py):
+                continue
+            if not self._in_triangle(rx, ry, mx, my, hit_x, my, px, py):
+                continue
+            key = (abs(ry - my) / (rx - mx), rx - mx)
+            if best_key is None or key < best_key:
+                best = r
+                best_key = key
+        return self._pick_copy(best, m)
+
+    def _in_triangle(self, x, y, x0, y0, x1, y1, x2, y2):
+        """True si (x, y) está dentro o sobre el borde del triángulo (con predicados exactos)"""
+        d1 = predicates.orient2d(x0, y0, x1, y1, x, y)
+        d2 = predicates.orient2d(x1, y1, x2, y2, x, y)
+        d3 = predicates.orient2d(x2, y2, x0, y0, x, y)
+        return (d1 >= 0 and d2 >= 0 and d3 >= 0) or (d1 <= 0 and d2 <= 0 and d3 <= 0)
+
+    def _pick_copy(self, p, m):
+        """Entre las ranuras que repiten el vértice de p, la que tiene a m dentro de su ángulo interior"""
+        for s in self.copies.get(self.source[p], (p,)):
+            a = self.prev[s]
+            c = self.next[s]
+            if self._orient(a, s, c) < 0:
+                inside = self._orient(a, s, m) <= 0 and self._orient(s, c, m) <= 0
+            else:
+                inside = self._orient(a, s, m) < 0 or self._orient(s, c, m) < 0
+            if inside:
+                return s
+        return p
+
+    def _copy(self, s):
+        c = len(self.xs)
+        self.xs.append(self.xs[s])
+        self.ys.append(self.ys[s])
+        self.source.append(self.source[s])
+        self.prev.append(0)
+        self.next.append(0)
+        self.edge_of.append(None)
+        self.copies.setdefault(self.source[s], [s]).append(c)
+        return c
+
+    def _bridge(self, p, m, hole):
+        """Recorre p -> m -> ...hueco... -> m' -> p' -> siguiente de p"""
+        prev = self.prev
+        next = self.next
+        for h in hole:
+            self.points.insert(h)
+            self._add_edge(h)
+
+        p2 = self._copy(p)
+        m2 = self._copy(m)
+        pn = next[p]
+        mp = prev[m]
+        # la arista que salía de p ahora sale de su copia (mismo segmento)
+        e = self.edge_of[p]
+        self.edge_start[e] = p2
+        self.edge_of[p2] = e
+        next[p] = m
+        prev[m] = p
+        next[mp] = m2
+        prev[m2] = mp
+        next[m2] = p2
+        prev[p2] = m2
+        next[p2] = pn
+        prev[pn] = p2
+        self._add_edge(p)
+        self._add_edge(m2)
+        self.points.insert(p2)
+        self.points.insert(m2)
+
+def merge_holes(outer, holes):
+    """Convierte un polígono con huecos en un solo anillo unido por puentes.
+
+    Los huecos se procesan por x máxima decreciente y el vértice del puente
+    se busca con índices espaciales (una grilla de aristas que se recorre a lo
+    largo del rayo y una grilla de vértices), sin recorrer el anillo por cada
+    hueco. Devuelve los
+    vértices del anillo (los extremos de cada puente aparecen dos veces) y,
+    para cada uno, su índice en la concatenación de `outer` y `holes`."""
+    return _Bridging(outer, holes).merge()
@@ -1,4 +1,6 @@
 class DoublyLinkedItem:
+    __slots__ = ("value", "next", "prev")
+
     def __init__(self, value):
         self.value = value
         self.next = None
@@ -0,0 +1,126 @@
+import predicates
+import vectorized
+from grid import SegmentGrid
+
+class TriangleLocator:
+    """Índice de localización de puntos sobre una triangulación.
+
+    `triangles` son tripletas de puntos (como EarClippingAnim.triangles o
+    el resultado de triangulation.triangulate). Cada triángulo se registra
+    en las celdas de un SegmentGrid que realmente toca (no en toda su caja
+    envolvente, que para los triángulos largos y finos es mucho más
+    grande); una consulta solo prueba los triángulos de la celda del punto
+    con los predicados robustos, así que cuesta O(1) en promedio cuando
+    los triángulos tienen tamaños parecidos a las celdas. Los puntos sobre una
+    arista compartida se asignan a uno cualquiera de los dos triángulos."""
+
+    def __init__(self, triangles):
+        self.triangles = [tuple((p[0], p[1]) for p in triangle) for triangle in triangles]
+        if self.triangles:
+            xs = [p[0] for triangle in self.triangles for p in triangle]
+            ys = [p[1] for triangle in self.triangles for p in triangle]
+            bounds = (min(xs), min(ys), max(xs), max(ys))
+        else:
+            bounds = (0, 0, 0, 0)
+        self.grid = SegmentGrid(*bounds, len(self.triangles))
+        for t, triangle in enumerate(self.triangles):
+            self.grid.insert_convex(t, triangle)
+        self.arrays = None
+
+    def __len__(self):
+        return len(self.triangles)
+
+    def contains(self, t, x, y):
+        """True si el punto está dentro o sobre el borde del triángulo t"""
+        (ax, ay), (bx, by), (cx, cy) = self.triangles[t]
+        o0 = predicates.orient2d(x, y, bx, by, cx, cy)
+        o1 = predicates.orient2d(ax, ay, x, y, cx, cy)
+        o2 = predicates.orient2d(ax, ay, bx, by, x, y)
+        # sirve para cualquier sentido de recorrido; los triángulos degenerados no contienen nada
+        return ((o0 >= 0 and o1 >= 0 and o2 >= 0) or (o0 <= 0 and o1 <= 0 and o2 <= 0)) and (o0 != 0 or o1 != 0 or o2 != 0)
+
+    def locate(self, x, y):
+        """Índice del triángulo que contiene al punto, o -1 si está fuera de la triangulación"""
+        for t in self.grid.query(x, y, x, y):
+            if self.contains(t, x, y):
+                return t
+        return -1
+
+    def barycentric(self, t, x, y):
+        """Coordenadas baricéntricas (l0, l1, l2) del punto respecto de los vértices del triángulo t"""
+        (ax, ay), (bx, by), (cx, cy) = self.triangles[t]
+        area = (bx - ax) * (cy - ay) - (by - ay) * (cx - ax)
+        l0 = ((bx - x) * (cy - y) - (by - y) * (cx - x)) / area
+        l1 = ((cx - x) * (ay - y) - (cy - y) * (ax - x)) / area
+        return l0, l1, 1 - l0 - l1
+
+    def _build_arrays(self):
+        # celdas del grid en formato CSR: claves ordenadas, inicio de cada una y triángulos concatenados
+        np = vectorized.np
+        keys = sorted(self.grid.cells)
+        counts = np.fromiter((len(self.grid.cells[key]) for key in keys), np.int64, len(keys))
+        starts = np.zeros(len(keys) + 1, np.int64)
+        np.cumsum(counts, out=starts[1:])
+        items = np.fromiter((t for key in keys for t in self.grid.cells[key]), np.int64, int(starts[-1]))
+        corners = vectorized.as_points([p for triangle in self.triangles for p in triangle]).reshape(-1, 3, 2)
+        self.arrays = (np.array(keys, np.int64), starts, items, corners)
+        return self.arrays
+
+    def locate_many(self, points):
+        """Localiza muchos puntos a la vez.
+
+        Con NumPy devuelve (índices, baricéntricas): un arreglo de N enteros
+        (-1 fuera de la triangulación) y otro (N, 3) con las coordenadas
+        baricéntricas (NaN para los de afuera). Sin NumPy devuelve las mismas
+        dos listas calculadas punto por punto."""
+        if not vectorized.available():
+            indices = [self.locate(p[0], p[1]) for p in points]
+            nan = float("nan")
+            return indices, [self.barycentric(t, p[0], p[1]) if t >= 0 else (nan, nan, nan)
+                             for t, p in zip(indices, points)]
+        np = vectorized.np
+        points = vectorized.as_points(points)
+        n = len(points)
+        indices = np.full(n, -1, np.int64)
+        weights = np.full((n, 3), np.nan)
+        if not self.triangles or not n:
+            return indices, weights
+        keys, starts, items, corners = self.arrays or self._build_arrays()
+
+        # misma celda que SegmentGrid._column/_row, con los puntos de afuera recortados al borde
+        grid = self.grid
+        cx = np.clip(((points[:, 0] - grid.min_x) * grid.inv_cell_size).astype(np.int64), 0, grid.last_column)
+        cy = np.clip(((points[:, 1] - grid.min_y) * grid.inv_cell_size).astype(np.int64), 0, grid.rows - 1)
+        cell = cx * grid.rows + cy
+        slot = np.minimum(np.searchsorted(keys, cell), len(keys) - 1)
+        present = keys[slot] == cell
+        first = np.where(present, starts[slot], 0)
+        count = np.where(present, starts[slot + 1] - starts[slot], 0)
+
+        # se prueba el k-ésimo candidato de cada celda a la vez, hasta el más largo
+        for k in range(int(count.max())):
+            pending = np.flatnonzero((count > k) & (indices < 0))
+            if not len(pending):
+                break
+            candidates = items[first[pending] + k]
+            a = corners[candidates, 0]
+            b = corners[candidates, 1]
+            c = corners[candidates, 2]
+            p = points[pending]
+            o0 = vectorized.orient2d(p, b, c)
+            o1 = vectorized.orient2d(a, p, c)
+            o2 = vectorized.orient2d(a, b, p)
+            inside = (((o0 >= 0) & (o1 >= 0) & (o2 >= 0)) | ((o0 <= 0) & (o1 <= 0) & (o2 <= 0))) \
+                & ((o0 != 0) | (o1 != 0) | (o2 != 0))
+            indices[pending[inside]] = candidates[inside]
+
+        found = np.flatnonzero(indices >= 0)
+        a = corners[indices[found], 0]
+        b = corners[indices[found], 1]
+        c = corners[indices[found], 2]
+        p = points[found]
+        area = vectorized.orientation(a, b, c)
+        weights[found, 0] = vectorized.orientation(p, b, c) / area
+        weights[found, 1] = vectorized.orientation(a, p, c) / area
+        weights[found, 2] = 1 - weights[found, 0] - weights[found, 1]
+        return indices, weights
@@ -0,0 +1,82 @@
+class TriangleMesh:
+    """Triangulación con adyacencia por semiaristas.
+
+    Cada triángulo (a, b, c) registra sus semiaristas dirigidas (a, b), (b, c)
+    y (c, a); el vecino a través de (a, b) es el dueño de (b, a), así que
+    encontrarlo cuesta O(1). Todos los triángulos deben tener la misma
+    orientación."""
+
+    def __init__(self):
+        self.triangles = []
+        self.half_edges = {}
+
+    def add_triangle(self, a, b, c):
+        """Añade el triángulo (a, b, c) y devuelve su identificador"""
+        t = len(self.triangles)
+        self.triangles.append((a, b, c))
+        self._link(t)
+        return t
+
+    def _link(self, t):
+        a, b, c = self.triangles[t]
+        self.half_edges[(a, b)] = t
+        self.half_edges[(b, c)] = t
+        self.half_edges[(c, a)] = t
+
+    def _unlink(self, t):
+        a, b, c = self.triangles[t]
+        del self.half_edges[(a, b)]
+        del self.half_edges[(b, c)]
+        del self.half_edges[(c, a)]
+
+    def opposite(self, t, u, v):
+        """Vértice de t que no está en la arista (u, v)"""
+        for w in self.triangles[t]:
+            if w != u and w != v:
+                return w
+
+    def neighbour(self, u, v):
+        """Triángulo al otro lado de la semiarista (u, v) o None si es borde"""
+        return self.half_edges.get((v, u))
+
+    def flip(self, u, v):
+        """Cambia la diagonal (u, v) por la que une los vértices opuestos.
+
+        Devuelve los dos triángulos nuevos ((w, u, x), (x, v, w))."""
+        t = self.half_edges[(u, v)]
+        s = self.half_edges[(v, u)]
+        w = self.opposite(t, u, v)
+        x = self.opposite(s, u, v)
+        self._unlink(t)
+        self._unlink(s)
+        self.triangles[t] = (w, u, x)
+        self.triangles[s] = (x, v, w)
+        self._link(t)
+        self._link(s)
+        return self.triangles[t], self.triangles[s]
+
+    def legalize(self, edges, is_illegal, on_flip=None):
+        """Pasada de Lawson: voltea aristas ilegales hasta que no quede ninguna.
+
+        `edges` son las semiaristas sospechosas iniciales; `is_illegal(u, v, w, x)`
+        decide si la arista (u, v), con w y x como vértices opuestos, debe voltearse.
+        Las aristas sin vecino (bordes del polígono) nunca se voltean."""
+        stack = list(edges)
+        flips = 0
+        while stack:
+            u, v = stack.pop()
+            t = self.half_edges.get((u, v))
+            s = self.half_edges.get((v, u))
+            if t is None or s is None:
+                continue
+            w = self.opposite(t, u, v)
+            x = self.opposite(s, u, v)
+            if not is_illegal(u, v, w, x):
+                continue
+            t1, t2 = self.flip(u, v)
+            flips += 1
+            if on_flip is not None:
+                on_flip((u, v), t1, t2)
+            # las cuatro aristas exteriores del cuadrilátero pueden haber dejado de ser legales
+            stack.extend(((u, x), (x, v), (v, w), (w, u)))
+        return flips
@@ -0,0 +1,368 @@
+import math
+
+from time import perf_counter
+
+from sortedcontainers import SortedList
+
+import predicates
+from point import Point
+from stats import Suspendable
+from sweepline import Probe, SweepState
+
+START, END, SPLIT, MERGE, REGULAR = "start", "end", "split", "merge", "regular"
+
+class _Edge:
+    """Arista (i, next[i]) en el estado del barrido, ordenada por su x a la altura actual"""
+    __slots__ = ("start", "x1", "y1", "x2", "y2", "sweep")
+
+    def __init__(self, start, p, q, sweep):
+        self.start = start
+        self.x1, self.y1 = p
+        self.x2, self.y2 = q
+        self.sweep = sweep
+
+    def sweep_x(self):
+        sweep = self.sweep
+        if self.y1 == self.y2:
+            return min(max(sweep.x, min(self.x1, self.x2)), max(self.x1, self.x2))
+        return self.x1 + (sweep.y - self.y1) * (self.x2 - self.x1) / (self.y2 - self.y1)
+
+    def __lt__(self, other):
+        if other.__class__ is Probe:
+            return self.sweep_x() < other.value
+        x = self.sweep_x()
+        other_x = other.sweep_x()
+        if x != other_x:
+            return x < other_x
+        return self.start < other.start
+
+class MonotonePartition(Suspendable):
+    """Triangulación en O(n log n) por partición en piezas y-monótonas.
+
+    Un barrido de arriba abajo clasifica cada vértice (inicio, fin, división,
+    unión o regular) y agrega diagonales que dejan piezas monótonas; cada
+    pieza se triangula en tiempo lineal con una pila. Acepta huecos. Igual
+    que EarClipping, notifica los pasos a un `recorder` opcional (ver
+    MonotoneAnim). Con `stats` se miden las fases: el barrido cuenta como
+    "initial_scan" y la triangulación de las piezas como "clipping"."""
+
+    def __init__(self, vertices, recorder=None, holes=None, stats=None):
+        start_time = perf_counter()
+        rings = [vertices] + list(holes or ())
+        self.xs = []
+        self.ys = []
+        self.prev = []
+        self.next = []
+        self.ring_starts = []
+        for k, ring in enumerate(rings):
+            if len(ring) < 3:
+                raise ValueError("vertices should have at least 3 items")
+            start = len(self.xs)
+            size = len(ring)
+            self.xs.extend(p[0] for p in ring)
+            self.ys.extend(p[1] for p in ring)
+            indices = list(range(start, start + size))
+            # exterior con área positiva (interior a la izquierda de cada arista), huecos al revés
+            area = self._area(indices)
+            if (area < 0) if k == 0 else (area > 0):
+                indices.reverse()
+            self.ring_starts.append(start)
+            self.prev.extend([0] * size)
+            self.next.extend([0] * size)
+            for a, b in zip(indices, indices[1:] + indices[:1]):
+                self.next[a] = b
+                self.prev[b] = a
+        self.recorder = recorder
+        self.stats = stats
+        self.diagonals = []
+        self.triangles = []
+        self.triangle_indices = []
+        if stats is not None:
+            stats.phases["preprocess"] += perf_counter() - start_time
+
+    def _area(self, ring):
+        xs = self.xs
+        ys = self.ys
+        area = 0
+        for a, b in zip(ring, ring[1:] + ring[:1]):
+            area += xs[a] * ys[b] - xs[b] * ys[a]
+        return area
+
+    def _orient(self, a, b, c):
+        xs = self.xs
+        ys = self.ys
+        return predicates.orient2d(xs[a], ys[a], xs[b], ys[b], xs[c], ys[c])
+
+    def _above(self, a, b):
+        """True si a se procesa antes que b: mayor y y, a igual y, menor x"""
+        return (self.ys[a], -self.xs[a]) > (self.ys[b], -self.xs[b])
+
+    def point(self, i):
+        return Point(self.xs[i], self.ys[i])
+
+    def classify(self, i):
+        p = self.prev[i]
+        q = self.next[i]
+        convex = self._orient(p, i, q) > 0
+        if self._above(i, p) and self._above(i, q):
+            return START if convex else SPLIT
+        if self._above(p, i) and self._above(q, i):
+            return END if convex else MERGE
+        return REGULAR
+
+    def run(self):
+        """Recorre el algoritmo y devuelve la lista de triángulos (tuplas de puntos)"""
+        point_of = self.point
+        self.triangles = [(point_of(a), point_of(b), point_of(c)) for a, b, c in self.run_indices()]
+        return self.triangles
+
+    def run_indices(self):
+        """Recorre el algoritmo y devuelve los triángulos como tripletas de índices"""
+        for _ in self.steps():
+            pass
+        return self.triangle_indices
+
+    def steps(self):
+        """Recorre el algoritmo como generador, igual que EarClipping.steps().
+
+        Con `recorder` se suspende después de cada vértice del barrido y de
+        cada triángulo; los triángulos quedan en `triangle_indices`."""
+        recorder = self.recorder
+        stats = self.stats
+        if recorder is not None:
+            for first in self.ring_starts:
+                recorder.start([self.point(i) for i in self._ring_order(first)])
+            yield from self._suspend()
+        start_time = perf_counter()
+        suspended = self.suspended
+        yield from self._partition()
+        if stats is not None:
+            now = perf_counter()
+            stats.phases["initial_scan"] += now - start_time - (self.suspended - suspended)
+            start_time = now
+            suspended = self.suspended
+        for piece in self._pieces():
+            for triangle in self._triangulate_piece(piece):
+                self._emit(*triangle)
+                if recorder is not None:
+                    yield from self._suspend()
+        if stats is not None:
+            stats.phases["clipping"] += perf_counter() - start_time - (self.suspended - suspended)
+        if recorder is not None:
+            recorder.finish(self._outline())
+
+    def _ring_order(self, first):
+        out = [first]
+        i = self.next[first]
+        while i != first:
+            out.append(i)
+            i = self.next[i]
+        return out
+
+    def _outline(self):
+        """Un solo contorno con el exterior y los huecos, para rellenar el polígono.
+
+        Cada hueco (orientado al revés que el exterior) se une al primer
+        vértice del exterior con un puente de ida y vuelta: con la regla de
+        relleno no nula los puentes se anulan y los huecos quedan vacíos."""
+        outer = [self.point(i) for i in self._ring_order(0)]
+        outline = outer + outer[:1]
+        for first in self.ring_starts[1:]:
+            hole = [self.point(i) for i in self._ring_order(first)]
+            outline.extend(hole + [hole[0], outer[0]])
+        return outline
+
+    def _add_diagonal(self, a, b):
+        self.diagonals.append((a, b))
+        if self.recorder is not None:
+            self.recorder.diagonal(self.point(a), self.point(b))
+
+    def _partition(self):
+        """Barrido que agrega las diagonales de la partición en piezas monótonas (generador, ver steps)"""
+        xs = self.xs
+        ys = self.ys
+        prev = self.prev
+        next = self.next
+        sweep = SweepState()
+        status = SortedList()
+        edges = {}
+        helper = {}
+        merge = set()
+
+        def insert(i):
+            edge = _Edge(i, (xs[i], ys[i]), (xs[next[i]], ys[next[i]]), sweep)
+            edges[i] = edge
+            helper[i] = i
+            status.add(edge)
+
+        def remove(i):
+            status.remove(edges.pop(i))
+
+        def left_of(i):
+            # arista del estado inmediatamente a la izquierda del vértice
+            return status[status.bisect_left(Probe(xs[i])) - 1].start
+
+        def connect_helper(e, i):
+            if helper[e] in merge:
+                self._add_diagonal(i, helper[e])
+
+        order = sorted(range(len(xs)), key=lambda i: (-ys[i], xs[i]))
+        for i in order:
+            sweep.x = xs[i]
+            sweep.y = ys[i]
+            kind = self.classify(i)
+            if self.recorder is not None:
+                self.recorder.sweep(self.point(i), kind)
+            p = prev[i]
+            if kind == START:
+                insert(i)
+            elif kind == END:
+                connect_helper(p, i)
+                remove(p)
+            elif kind == SPLIT:
+                e = left_of(i)
+                self._add_diagonal(i, helper[e])
+                helper[e] = i
+                insert(i)
+            elif kind == MERGE:
+                merge.add(i)
+                connect_helper(p, i)
+                remove(p)
+                e = left_of(i)
+                connect_helper(e, i)
+                helper[e] = i
+            elif self._above(p, i):
+                # el interior queda a la derecha: la cadena baja por el lado izquierdo
+                connect_helper(p, i)
+                remove(p)
+                insert(i)
+            else:
+                e = left_of(i)
+                connect_helper(e, i)
+                helper[e] = i
+            if self.recorder is not None:
+                yield from self._suspend()
+
+    def _pieces(self):
+        """Caras interiores de anillos + diagonales, cada una en orden antihorario"""
+        xs = self.xs
+        ys = self.ys
+        neighbours = [[self.prev[i], self.next[i]] for i in range(len(xs))]
+        for a, b in self.diagonals:
+            neighbours[a].append(b)
+            neighbours[b].append(a)
+        # vecinos de cada vértice por ángulo, para seguir cada cara girando a la izquierda
+        rank = {}
+        for i, around in enumerate(neighbours):
+            if len(around) > 2:
+                around.sort(key=lambda j: math.atan2(ys[j] - ys[i], xs[j] - xs[i]))
+                rank[i] = {j: k for k, j in enumerate(around)}
+
+        def following(u, v):
+            around = neighbours[v]
+            if len(around) == 2:
+                return around[0] if around[1] == u else around[1]
+            return around[(rank[v][u] - 1) % len(around)]
+
+        directed = [(i, self.next[i]) for i in range(len(xs))]
+        for a, b in self.diagonals:
+            directed.append((a, b))
+            directed.append((b, a))
+        visited = set()
+        for u, v in directed:
+            if (u, v) in visited:
+                continue
+            piece = [u]
+            while (u, v) not in visited:
+                visited.add((u, v))
+                u, v = v, following(u, v)
+                piece.append(u)
+            piece.pop()
+            yield piece
+
+    def _emit(self, a, b, c):
+        # misma orientación que los triángulos de EarClipping
+        if self._orient(a, b, c) > 0:
+            a, c = c, a
+        self.triangle_indices.append((a, b, c))
+        if self.recorder is not None:
+            self.recorder.clip((self.point(a), self.point(b), self.point(c)))
+
+    def _triangulate_piece(self, piece):
+        """Triangulación lineal de una pieza y-monótona en orden antihorario; genera los triángulos"""
+        k = len(piece)
+        if k == 3:
+            yield tuple(piece)
+            return
+        above = self._above
+        top = 0
+        bottom = 0
+        for j in range(1, k):
+            if above(piece[j], piece[top]):
+                top = j
+            if above(piece[bottom], piece[j]):
+                bottom = j
+        # en sentido antihorario, desde arriba se baja por la cadena izquierda
+        left = []
+        j = top
+        while j != bottom:
+            left.append(piece[j])
+            j = (j + 1) % k
+        right = []
+        j = (top - 1) % k
+        while j != bottom:
+            right.append(piece[j])
+            j = (j - 1) % k
+        chain = {}
+        for v in left:
+            chain[v] = "L"
+        for v in right:
+            chain[v] = "R"
+
+        # mezcla de las dos cadenas ya ordenadas de arriba abajo
+        merged = [left[0]]
+        a = 1
+        b = 0
+        while a < len(left) or b < len(right):
+            if b >= len(right) or (a < len(left) and above(left[a], right[b])):
+                merged.append(left[a])
+                a += 1
+            else:
+                merged.append(right[b])
+                b += 1
+        merged.append(piece[bottom])
+
+        stack = [merged[0], merged[1]]
+        for u in merged[2:-1]:
+            if chain[u] != chain[stack[-1]]:
+                # cadena opuesta: u ve a todos los vértices de la pila
+                previous = stack[-1]
+                while len(stack) > 1:
+                    top_vertex = stack.pop()
+                    yield u, top_vertex, stack[-1]
+                stack = [previous, u]
+            else:
+                # misma cadena: cortar mientras la diagonal quede dentro de la pieza
+                last = stack.pop()
+                while stack:
+                    turn = self._orient(stack[-1], last, u)
+                    if (turn > 0) if chain[u] == "L" else (turn < 0):
+                        yield u, last, stack[-1]
+                        last = stack.pop()
+                    else:
+                        break
+                stack.append(last)
+                stack.append(u)
+        u = merged[-1]
+        while len(stack) > 1:
+            top_vertex = stack.pop()
+            yield u, top_vertex, stack[-1]
+
+def triangulate_monotone(vertices, indices=False, holes=None, stats=None):
+    """Triangula con el motor de partición monótona; mismo formato que triangulation.triangulate.
+
+    Con `indices=True` los índices son sobre `vertices` seguidos de los de `holes`."""
+    engine = MonotonePartition(vertices, holes=holes, stats=stats)
+    if indices:
+        return engine.run_indices()
+    return engine.run()
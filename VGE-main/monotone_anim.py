@@ -0,0 +1,45 @@
+from drawing import CIRCLE, POLYGON, SEGMENT, PULSE, Style
+from earclipping_anim import CLIPPED, EDGE
+from recorder import AnimRecorder
+from monotone import MonotonePartition, START, END, SPLIT, MERGE, REGULAR
+
+# Color de cada tipo de vértice durante el barrido.
+VERTEX_COLORS = {
+    START: (0, 1, 0),
+    END: (1, 0, 0),
+    SPLIT: (1, 1, 0),
+    MERGE: (1, 0, 1),
+    REGULAR: (0.26, 0.65, 0.77),
+}
+
+DIAGONAL = Style(1, 0.6, 0)
+
+class MonotoneAnim(AnimRecorder):
+    """Graba los pasos de MonotonePartition como un plan de animación perezoso (ver AnimRecorder)."""
+
+    def __init__(self, vertices, stats=None, holes=None):
+        super().__init__(vertices, stats, holes)
+        self.sweep_styles = {kind: Style(*color, PULSE, fill=True, radius=1.5*self.vertex_radius)
+                             for kind, color in VERTEX_COLORS.items()}
+
+    def _engine(self, stats):
+        return MonotonePartition(self.vertices, recorder=self, holes=self.holes, stats=stats)
+
+    def sweep(self, vertex, kind):
+        """Resalta el vértice que procesa el barrido con el color de su tipo."""
+        self.display.step(0.5)
+        self.display.add(CIRCLE, self.sweep_styles[kind], (vertex,))
+
+    def diagonal(self, start, to):
+        """Dibuja una diagonal de la partición en piezas monótonas."""
+        self.display.step(1)
+        self.display.add(SEGMENT, DIAGONAL, (start, to))
+
+    def clip(self, triangle):
+        """Anima un triángulo de una pieza monótona."""
+        if self.recording:
+            self.triangles.append(triangle)
+        self.display.step(1)
+        self.display.add(POLYGON, CLIPPED, triangle)
+        self.display.step(0.5)
+        self.display.add(POLYGON, EDGE, triangle)
@@ -0,0 +1,217 @@
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from batch import triangulate_records
+from store import PolygonStore, triangle_slots
+
+# Estado de cada proceso del pool: vistas sobre los bloques de memoria compartida.
+_shared = {}
+
+def _buffer(data, typecode):
+    """`data` como buffer contiguo de `typecode`, sin copiar si ya lo es"""
+    try:
+        view = memoryview(data)
+    except TypeError:
+        return array(typecode, data)
+    if view.format == typecode and view.c_contiguous and view.ndim == 1:
+        return view
+    return array(typecode, view.tolist())
+
+def _attach(names, options):
+    blocks = {key: shared_memory.SharedMemory(name=name) for key, (name, _) in names.items()}
+    _shared["blocks"] = blocks
+    for key, (_, typecode) in names.items():
+        _shared[key] = blocks[key].buf.cast(typecode)
+    _shared.update(options)
+
+def _attach_store(path, options):
+    store = _shared["store"] = PolygonStore(path, writable=True)
+    _shared.update(coords=store.coords, rings=store.ring_offsets, polygons=store.polygon_offsets, slots=store.slots,
+                   out=store.triangles, counts=store.counts)
+    _shared.update(options)
+
+def _detach():
+    for key in ("coords", "rings", "polygons", "slots", "out", "counts"):
+        _shared.pop(key).release()
+    for block in _shared.pop("blocks", {}).values():
+        block.close()
+    store = _shared.pop("store", None)
+    if store is not None:
+        store.close()
+
+def _triangulate_range(task):
+    """Triangula los polígonos [first, last) y escribe sus triángulos en la salida compartida"""
+    first, last = task
+    coords = _shared["coords"]
+    ring_offsets = _shared["rings"]
+    polygon_offsets = _shared["polygons"]
+    slots = _shared["slots"]
+    out = _shared["out"]
+    counts = _shared["counts"]
+
+    def records():
+        for p in range(first, last):
+            # en un almacén, los ya triangulados (ver triangulate_store)
+            if counts[p] >= 0:
+                continue
+            rings = []
+            for r in range(polygon_offsets[p], polygon_offsets[p + 1]):
+                ring = coords[2 * ring_offsets[r]:2 * ring_offsets[r + 1]]
+                rings.append(list(zip(ring[0::2].tolist(), ring[1::2].tolist())))
+            yield p, rings
+
+    # los polígonos con errores quedan con la cantidad -1 que puso el proceso principal
+    for p, _, triangles in triangulate_records(records(), _shared["edge_swapping"], _shared["validate"],
+                                               engine=_shared["engine"]):
+        base = ring_offsets[polygon_offsets[p]]
+        start = 3 * slots[p]
+        out[start:start + 3 * len(triangles)] = array("I", [base + i for triangle in triangles for i in triangle])
+        counts[p] = len(triangles)
+    return last - first
+
+def _chunks(weights, target):
+    """Rangos contiguos de polígonos cuyo peso suma al menos `target` (el último puede quedar corto)"""
+    chunks = []
+    first = 0
+    weight = 0
+    for p, w in enumerate(weights):
+        weight += w
+        if weight >= target:
+            chunks.append((first, p + 1, weight))
+            first = p + 1
+            weight = 0
+    if first < len(weights):
+        chunks.append((first, len(weights), weight))
+    return chunks
+
+def _run(weights, workers, chunks_per_worker, initializer, initargs):
+    """Reparte los polígonos en rangos de peso parecido y los triangula en el pool (o acá con un solo proceso)"""
+    target = max(sum(weights) / (workers * chunks_per_worker), 1)
+    chunks = sorted(_chunks(weights, target), key=lambda chunk: chunk[2], reverse=True)
+    tasks = [(first, last) for first, last, _ in chunks]
+    if workers == 1 or len(tasks) <= 1:
+        initializer(*initargs)
+        try:
+            for task in tasks:
+                _triangulate_range(task)
+        finally:
+            _detach()
+    else:
+        with ProcessPoolExecutor(workers, initializer=initializer, initargs=initargs) as pool:
+            for _ in pool.map(_triangulate_range, tasks):
+                pass
+
+def triangulate_buffers(coords, ring_offsets, polygon_offsets=None, edge_swapping=False, validate=True,
+                        engine="earclipping", workers=None, chunks_per_worker=8):
+    """Triangula muchos polígonos guardados en buffers planos, al estilo de GeoArrow.
+
+    `coords` son los vértices intercalados (x0, y0, x1, y1, ...) como
+    float64; `ring_offsets[r]` es el primer vértice del anillo r (con uno
+    extra al final) y `polygon_offsets[p]`, el primer anillo del polígono p
+    (el exterior; los siguientes son sus huecos). Sin `polygon_offsets`
+    cada anillo es un polígono. Acepta array, memoryview, arreglos de NumPy
+    o secuencias.
+
+    Las coordenadas, los offsets y la salida se comparten con los procesos
+    del pool por multiprocessing.shared_memory: a cada proceso solo se le
+    envía el rango de polígonos de cada tarea. Los rangos se arman para que
+    tengan aproximadamente el mismo número de vértices (unos
+    `chunks_per_worker` por proceso) y se reparten empezando por los más
+    pesados, así que un polígono enorme no deja a los demás procesos sin
+    trabajo al final.
+
+    Devuelve (triángulos, offsets, errores): `triángulos` es un
+    array("I") plano con tres índices de vértice (sobre `coords`) por
+    triángulo, los del polígono p están en [3 * offsets[p], 3 * offsets[p + 1])
+    y `errores` son los índices de los polígonos que no se pudieron
+    triangular (ver batch.triangulate_records)."""
+    coords = _buffer(coords, "d")
+    ring_offsets = _buffer(ring_offsets, "q")
+    ring_count = len(ring_offsets) - 1
+    if polygon_offsets is None:
+        polygon_offsets = array("q", range(ring_count + 1))
+    else:
+        polygon_offsets = _buffer(polygon_offsets, "q")
+    polygon_count = len(polygon_offsets) - 1
+
+    slots = triangle_slots(ring_offsets, polygon_offsets)
+    weights = [ring_offsets[polygon_offsets[p + 1]] - ring_offsets[polygon_offsets[p]] for p in range(polygon_count)]
+
+    workers = workers or os.cpu_count() or 1
+    options = {"edge_swapping": edge_swapping, "validate": validate, "engine": engine}
+    inputs = {"coords": coords, "rings": ring_offsets, "polygons": polygon_offsets, "slots": slots}
+    sizes = {"out": (3 * slots[-1], "I"), "counts": (polygon_count, "q")}
+    blocks = {}
+    try:
+        names = {}
+        for key, data in inputs.items():
+            view = memoryview(data).cast("B")
+            block = blocks[key] = shared_memory.SharedMemory(create=True, size=max(view.nbytes, 1))
+            block.buf[:view.nbytes] = view
+            names[key] = (block.name, memoryview(data).format)
+        for key, (length, typecode) in sizes.items():
+            block = blocks[key] = shared_memory.SharedMemory(create=True, size=max(length * array(typecode).itemsize, 1))
+            names[key] = (block.name, typecode)
+        counts = blocks["counts"].buf.cast("q")
+        for p in range(polygon_count):
+            counts[p] = -1
+        counts.release()
+
+        _run(weights, workers, chunks_per_worker, _attach, (names, options))
+
+        out = blocks["out"].buf.cast("I")
+        counts = blocks["counts"].buf.cast("q")
+        try:
+            triangles = array("I")
+            offsets = array("q", [0]) * (polygon_count + 1)
+            errors = []
+            for p in range(polygon_count):
+                count = counts[p]
+                if count < 0:
+                    errors.append(p)
+                    count = 0
+                start = 3 * slots[p]
+                triangles.frombytes(out[start:start + 3 * count].cast("B"))
+                offsets[p + 1] = offsets[p] + count
+        finally:
+            out.release()
+            counts.release()
+        return triangles, offsets, errors
+    finally:
+        for block in blocks.values():
+            block.close()
+            block.unlink()
+
+def triangulate_store(path, edge_swapping=False, validate=True, engine="earclipping", workers=None, chunks_per_worker=8,
+                      retry=False):
+    """Triangula en el lugar los polígonos de un almacén (ver store.write_store).
+
+    Cada proceso abre el archivo con mmap, así que las coordenadas no se
+    copian ni se envían: se leen las páginas de cada rango de polígonos y
+    los triángulos se escriben directo en el bloque de salida. Los polígonos
+    ya triangulados se saltan salvo con `retry`. Devuelve los índices de
+    los polígonos que no se pudieron triangular."""
+    with PolygonStore(path, writable=True) as store:
+        if not store.has_output:
+            raise ValueError(f"{path} no tiene bloque de salida")
+        counts = store.counts
+        rings = store.ring_offsets
+        polygons = store.polygon_offsets
+        weights = []
+        for p in range(len(store)):
+            # los ya triangulados pesan 0 y quedan en el rango de algún vecino sin recalcularse
+            if counts[p] >= 0 and not retry:
+                weights.append(0)
+                continue
+            counts[p] = -1
+            weights.append(rings[polygons[p + 1]] - rings[polygons[p]])
+        store.flush()
+
+    workers = workers or os.cpu_count() or 1
+    options = {"edge_swapping": edge_swapping, "validate": validate, "engine": engine}
+    _run(weights, workers, chunks_per_worker, _attach_store, (path, options))
+
+    with PolygonStore(path) as store:
+        return [p for p in range(len(store)) if store.counts[p] < 0]
@@ -0,0 +1,86 @@
+from fractions import Fraction
+
+# Predicados geométricos robustos. Con coordenadas enteras (píxeles de la
+# aplicación, datos cuantizados) la aritmética de Python ya es exacta y la
+# expresión directa es el resultado. Con floats se aplica el filtro de
+# Shewchuk: si el valor calculado supera la cota de error su signo es
+# correcto; si no, se recalcula de forma exacta con fracciones.
+
+EPSILON = 2.0 ** -53
+# cota de error relativa de la expresión de orientación (ccwerrboundA)
+ORIENT_ERROR_BOUND = (3.0 + 16.0 * EPSILON) * EPSILON
+
+def orient2d_exact(ax, ay, bx, by, cx, cy):
+    """Orientación exacta (Fraction): los floats se convierten sin pérdida"""
+    # Cada coordenada es n/d con d potencia de 2: con el mayor d como escala
+    # común todo se calcula con enteros y se arma una sola Fraction al final.
+    ratios = [v.as_integer_ratio() for v in (ax, ay, bx, by, cx, cy)]
+    scale = max(d for _, d in ratios)
+    ax, ay, bx, by, cx, cy = (n * (scale // d) for n, d in ratios)
+    return Fraction((ax - cx) * (by - cy) - (ay - cy) * (bx - cx), scale * scale)
+
+def orient2d(ax, ay, bx, by, cx, cy):
+    """Orientación de (a, b, c) con signo garantizado.
+
+    Positivo si a, b, c giran en sentido antihorario (con y hacia arriba),
+    negativo si giran en sentido horario y cero si son colineales. Es la
+    misma expresión que EarClipping._orient; solo el signo es significativo."""
+    detleft = (ax - cx) * (by - cy)
+    detright = (ay - cy) * (bx - cx)
+    det = detleft - detright
+    if det.__class__ is int:
+        return det
+    bound = ORIENT_ERROR_BOUND * (abs(detleft) + abs(detright))
+    if det > bound or -det > bound:
+        return det
+    return orient2d_exact(ax, ay, bx, by, cx, cy)
+
+def collinear(ax, ay, bx, by, cx, cy):
+    """True si los tres puntos están exactamente alineados"""
+    return orient2d(ax, ay, bx, by, cx, cy) == 0
+
+# cota de error relativa de la expresión del circuncírculo (iccerrboundA)
+INCIRCLE_ERROR_BOUND = (10.0 + 96.0 * EPSILON) * EPSILON
+
+def incircle_exact(ax, ay, bx, by, cx, cy, dx, dy):
+    """incircle() exacto (Fraction), con la misma escala común que orient2d_exact"""
+    ratios = [v.as_integer_ratio() for v in (ax, ay, bx, by, cx, cy, dx, dy)]
+    scale = max(d for _, d in ratios)
+    ax, ay, bx, by, cx, cy, dx, dy = (n * (scale // d) for n, d in ratios)
+    return Fraction(_incircle_terms(ax - dx, ay - dy, bx - dx, by - dy, cx - dx, cy - dy), scale ** 4)
+
+def _incircle_terms(adx, ady, bdx, bdy, cdx, cdy):
+    return ((adx * adx + ady * ady) * (bdx * cdy - cdx * bdy)
+            + (bdx * bdx + bdy * bdy) * (cdx * ady - adx * cdy)
+            + (cdx * cdx + cdy * cdy) * (adx * bdy - bdx * ady))
+
+def incircle(ax, ay, bx, by, cx, cy, dx, dy):
+    """Posición de d respecto del círculo que pasa por a, b y c, con signo garantizado.
+
+    Si a, b, c giran en sentido antihorario (orient2d > 0), es positivo con
+    d dentro del círculo, negativo fuera y cero sobre él; con a, b, c en
+    sentido horario el signo se invierte."""
+    adx = ax - dx
+    ady = ay - dy
+    bdx = bx - dx
+    bdy = by - dy
+    cdx = cx - dx
+    cdy = cy - dy
+    alift = adx * adx + ady * ady
+    blift = bdx * bdx + bdy * bdy
+    clift = cdx * cdx + cdy * cdy
+    bdxcdy = bdx * cdy
+    cdxbdy = cdx * bdy
+    cdxady = cdx * ady
+    adxcdy = adx * cdy
+    adxbdy = adx * bdy
+    bdxady = bdx * ady
+    det = alift * (bdxcdy - cdxbdy) + blift * (cdxady - adxcdy) + clift * (adxbdy - bdxady)
+    if det.__class__ is int:
+        return det
+    permanent = ((abs(bdxcdy) + abs(cdxbdy)) * alift + (abs(cdxady) + abs(adxcdy)) * blift
+                 + (abs(adxbdy) + abs(bdxady)) * clift)
+    bound = INCIRCLE_ERROR_BOUND * permanent
+    if det > bound or -det > bound:
+        return det
+    return incircle_exact(ax, ay, bx, by, cx, cy, dx, dy)
@@ -0,0 +1,103 @@
+import predicates
+import vectorized
+
+class PreparedPolygon:
+    """Polígono listo para los motores: anillos limpios, orientados y con su mapa de índices.
+
+    `vertices` es el exterior con el criterio de EarClipping._is_clockwise
+    positivo y `holes` son los interiores en sentido contrario, así que los
+    motores no necesitan invertir nada. `index_map[k]` es el índice del
+    k-ésimo vértice limpio (exterior y después los huecos) en la
+    concatenación de los anillos de entrada. `bbox` es (min_x, min_y, max_x,
+    max_y) del exterior y `area`, el área del exterior menos la de los huecos."""
+    __slots__ = ("vertices", "holes", "index_map", "bbox", "area")
+
+    def __init__(self, vertices, holes, index_map, bbox, area):
+        self.vertices = vertices
+        self.holes = holes
+        self.index_map = index_map
+        self.bbox = bbox
+        self.area = area
+
+def clean_ring(ring):
+    """Índices de los vértices de `ring` que quedan tras la limpieza, en orden.
+
+    Quita los vértices repetidos consecutivos y los colineales con sus
+    vecinos sobre una lista doblemente enlazada. Al quitar uno se revisan de
+    nuevo sus dos vecinos, así que también desaparecen los colineales que
+    aparecen después de cada eliminación; cada vértice vuelve a la cola a lo
+    sumo dos veces, por lo que el costo es lineal."""
+    n = len(ring)
+    queue = None
+    if n >= vectorized.VECTOR_THRESHOLD and vectorized.available():
+        # primera pasada vectorizada: solo entran a la cola los colineales de la entrada
+        np = vectorized.np
+        coords = vectorized.as_points(ring)
+        # float64 representa sin redondeo los enteros de hasta 2^53; con mayores se revisa todo
+        if np.abs(coords).max() <= 2.0 ** 53:
+            queue = np.flatnonzero(vectorized.collinear(np.roll(coords, 1, axis=0), coords,
+                                                        np.roll(coords, -1, axis=0))).tolist()
+            if not queue:
+                return list(range(n))
+    if queue is None:
+        queue = list(range(n))
+    xs = [p[0] for p in ring]
+    ys = [p[1] for p in ring]
+    prev = list(range(-1, n - 1))
+    next = list(range(1, n + 1))
+    if n:
+        prev[0] = n - 1
+        next[-1] = 0
+    removed = bytearray(n)
+    alive = n
+    orient2d = predicates.orient2d
+    while queue and alive > 2:
+        i = queue.pop()
+        if removed[i]:
+            continue
+        p = prev[i]
+        q = next[i]
+        # un repetido es colineal con cualquier vecino
+        if orient2d(xs[p], ys[p], xs[i], ys[i], xs[q], ys[q]) != 0:
+            continue
+        removed[i] = 1
+        alive -= 1
+        next[p] = q
+        prev[q] = p
+        queue.append(p)
+        queue.append(q)
+    return [i for i in range(n) if not removed[i]]
+
+def prepare(vertices, holes=None):
+    """Limpia y orienta el exterior y los huecos en O(n) y devuelve un PreparedPolygon.
+
+    Lanza ValueError si algún vértice tiene menos de 2 coordenadas o si a algún
+    anillo le quedan menos de 3 vértices."""
+    rings = [vertices] + list(holes or ())
+    cleaned = []
+    index_map = []
+    offset = 0
+    area = 0
+    for k, ring in enumerate(rings):
+        if any(len(p) < 2 for p in ring):
+            raise ValueError("vértice con menos de 2 coordenadas")
+        kept = clean_ring(ring)
+        if len(kept) < 3:
+            raise ValueError("anillo con menos de 3 vértices no colineales")
+        points = [ring[i] for i in kept]
+        criterion = 0
+        last = points[-1]
+        for p in points:
+            criterion += (p[0] - last[0]) * (p[1] + last[1])
+            last = p
+        if (criterion <= 0) if k == 0 else (criterion > 0):
+            points.reverse()
+            kept.reverse()
+        cleaned.append(points)
+        index_map.extend(offset + i for i in kept)
+        offset += len(ring)
+        area += abs(criterion) / 2 if k == 0 else -abs(criterion) / 2
+    outer = cleaned[0]
+    bbox = (min(p[0] for p in outer), min(p[1] for p in outer),
+            max(p[0] for p in outer), max(p[1] for p in outer))
+    return PreparedPolygon(outer, cleaned[1:], index_map, bbox, area)
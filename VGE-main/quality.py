@@ -0,0 +1,47 @@
+import math
+
+import predicates
+
+# Medidas de calidad de triángulos sin trigonometría ni raíces. Solo se usan
+# para comparar, así que basta con cantidades monótonas en el ángulo.
+
+# bits de mantisa que se conservan en las claves de min_angle_key
+KEY_BITS = 32
+KEY_SCALE = 2.0 ** KEY_BITS
+
+def min_angle_key(ax, ay, bx, by, cx, cy):
+    """Seno al cuadrado del ángulo mínimo del triángulo; crece con ese ángulo.
+
+    El ángulo mínimo nunca supera 60° y es el opuesto al lado más corto,
+    así que entre los otros dos lados s, t vale sin² = cruz² / (|s|² |t|²).
+    Es 0 para triángulos degenerados."""
+    abx = bx - ax
+    aby = by - ay
+    bcx = cx - bx
+    bcy = cy - by
+    cax = ax - cx
+    cay = ay - cy
+    ab = abx * abx + aby * aby
+    bc = bcx * bcx + bcy * bcy
+    ca = cax * cax + cay * cay
+    product = ab * bc * ca
+    if not product:
+        return 0.0
+    cross = abx * cay - aby * cax
+    key = cross * cross * min(ab, bc, ca) / product
+    # Triángulos congruentes en posiciones distintas difieren en el redondeo de
+    # sus coordenadas; se descartan los últimos bits para que empaten.
+    mantissa, exponent = math.frexp(key)
+    return math.ldexp(round(mantissa * KEY_SCALE), exponent - KEY_BITS)
+
+def is_illegal(ux, uy, vx, vy, wx, wy, xx, xy):
+    """Condición de Delaunay para la arista (u, v) con w y x como vértices opuestos.
+
+    Es ilegal si x cae estrictamente dentro del circuncírculo de (u, v, w),
+    lo que equivale a que los ángulos en w y en x sumen más de pi. Si (u, v, w)
+    es degenerado, es ilegal cuando w está entre u y v (ángulo llano en w)."""
+    orientation = predicates.orient2d(ux, uy, vx, vy, wx, wy)
+    if orientation == 0:
+        return (ux - wx) * (vx - wx) + (uy - wy) * (vy - wy) < 0
+    det = predicates.incircle(ux, uy, vx, vy, wx, wy, xx, xy)
+    return det > 0 if orientation > 0 else det < 0
@@ -0,0 +1,98 @@
+import abc
+from time import perf_counter
+
+import drawing
+from drawing import POLYGON, Style
+
+CONTOUR = Style(0.26, 0.65, 0.77)
+FILL = Style(1, 1, 1, fill=True, max_alpha=0.3)
+
+class AnimRecorder(abc.ABC):
+    """Base de las animaciones que graban los pasos de un motor como un plan perezoso.
+
+    El motor avanza solo cuando la reproducción necesita más pasos (ver
+    drawing.StepTimeline); se llama con (ctx, tiempo) en segundos del plan.
+    `length` es la duración conocida hasta ahora, `done` indica si el
+    algoritmo ya terminó y `triangles` crece a medida que se producen.
+
+    Las subclases construyen el motor en `_engine(stats)` y definen los
+    métodos que él notifica además de start() y finish(). Con `stats` (un
+    TriangulationStats) se cuentan las operaciones del algoritmo; el tiempo
+    de armar los pasos que no pertenece a sus fases se atribuye a la fase
+    "schedule"."""
+
+    def __init__(self, vertices, stats=None, holes=None):
+        self.vertex_radius = 5
+        self.vertices = vertices
+        self.holes = holes
+        self.stats = stats
+        self.triangles = []
+        self.display = None
+        self.recording = False
+        self.runs = 0
+        self.anim = drawing.StepTimeline(self.steps)
+
+    @abc.abstractmethod
+    def _engine(self, stats):
+        """Motor a grabar; `stats` es None en las ejecuciones que regeneran pasos"""
+
+    def _finished(self, engine):
+        """Se llama al terminar la primera ejecución del motor"""
+
+    def steps(self, display):
+        """Generador que agrega los pasos a `display` (una DisplayList) a medida que avanza el algoritmo.
+
+        La línea de tiempo vuelve a llamarlo para regenerar pasos ya
+        descartados; esas ejecuciones no cuentan en `stats` ni en `triangles`."""
+        first_run = self.runs == 0
+        self.runs += 1
+        stats = self.stats if first_run else None
+        if stats is not None:
+            algorithm_time = sum(stats.phases.values())
+            busy = 0.0
+            resumed = perf_counter()
+        engine = self._engine(stats)
+        # Los métodos de grabación agregan los pasos a `display`; otra
+        # ejecución pudo cambiarlo mientras este generador estaba suspendido.
+        self.display = display
+        self.recording = first_run
+        for _ in engine.steps():
+            if stats is not None:
+                busy += perf_counter() - resumed
+            yield
+            self.display = display
+            self.recording = first_run
+            if stats is not None:
+                resumed = perf_counter()
+        if first_run:
+            self._finished(engine)
+        if stats is not None:
+            busy += perf_counter() - resumed
+            stats.phases["schedule"] += busy - (sum(stats.phases.values()) - algorithm_time)
+        # los pasos grabados después de la última suspensión del motor
+        yield
+
+    @property
+    def length(self):
+        return self.anim.length
+
+    @property
+    def done(self):
+        return self.anim.done
+
+    def complete(self):
+        """Ejecuta el algoritmo hasta el final y devuelve la duración total del plan"""
+        return self.anim.complete()
+
+    def __call__(self, ctx, time):
+        self.anim(ctx, time)
+
+    def start(self, vertices):
+        """Añade la animación para dibujar un anillo del contorno."""
+        self.display.step(1)
+        self.display.add(POLYGON, CONTOUR, vertices)
+
+    def finish(self, vertices):
+        """Rellena el polígono."""
+        self.display.step(1)
+        self.display.add(POLYGON, FILL, vertices)
@@ -0,0 +1,70 @@
+from array import array
+
+from point import Point
+
+class VertexRing:
+    """Anillo de vértices compacto indexado por posición.
+
+    Las coordenadas viven en dos arreglos contiguos (`xs`, `ys`; int64 si
+    todas las coordenadas son enteras, si no float64) y los enlaces en dos
+    arreglos de índices `prev`/`next`. Los enteros que no entran en int64 se
+    guardan en listas (`typecode` None) para no perder exactitud. Un vértice
+    es su índice, no su valor, así que las coordenadas repetidas no se
+    confunden."""
+    __slots__ = ("xs", "ys", "prev", "next", "head", "size", "typecode")
+
+    def __init__(self, vertices):
+        if all(type(v[0]) is int and type(v[1]) is int for v in vertices):
+            self.typecode = "q"
+        else:
+            self.typecode = "d"
+        try:
+            self.xs = array(self.typecode, (v[0] for v in vertices))
+            self.ys = array(self.typecode, (v[1] for v in vertices))
+        except OverflowError:
+            self.typecode = None
+            self.xs = [v[0] for v in vertices]
+            self.ys = [v[1] for v in vertices]
+        n = len(self.xs)
+        self.prev = array("l", range(-1, n - 1))
+        self.next = array("l", range(1, n + 1))
+        if n:
+            self.prev[0] = n - 1
+            self.next[n - 1] = 0
+        self.head = 0
+        self.size = n
+
+    def __len__(self):
+        return self.size
+
+    def point(self, i):
+        return Point(self.xs[i], self.ys[i])
+
+    def reverse(self):
+        """Invierte el orden de los vértices (y con él la orientación)"""
+        self.xs.reverse()
+        self.ys.reverse()
+
+    def remove(self, i):
+        """Saca el vértice i del anillo en O(1)"""
+        if self.size <= 1:
+            raise ValueError("Invalid operation")
+        p = self.prev[i]
+        n = self.next[i]
+        self.next[p] = n
+        self.prev[n] = p
+        if self.head == i:
+            self.head = n
+        self.size -= 1
+
+    def indices(self):
+        """Índices de los vértices que siguen en el anillo, desde la cabeza"""
+        out = []
+        i = self.head
+        for _ in range(self.size):
+            out.append(i)
+            i = self.next[i]
+        return out
+
+    def points(self):
+        return [self.point(i) for i in self.indices()]
@@ -0,0 +1,80 @@
+from contextlib import contextmanager
+from time import perf_counter
+
+class Suspendable:
+    """Base de los motores cuyo steps() es un generador que se suspende para grabar los pasos.
+
+    `suspended` acumula el tiempo que el generador estuvo suspendido, para
+    descontarlo de las fases."""
+
+    suspended = 0.0
+
+    def _suspend(self):
+        """Punto de suspensión de steps(); acumula el tiempo suspendido"""
+        start = perf_counter()
+        yield
+        self.suspended += perf_counter() - start
+
+class TriangulationStats:
+    """Contadores y tiempos por fase de una o varias triangulaciones.
+
+    Es opcional: los algoritmos reciben `stats=None` por defecto y en ese
+    caso no cuentan nada. Una misma instancia puede pasarse a varias
+    triangulaciones para acumular totales (por ejemplo, en batch.py)."""
+
+    COUNTERS = (
+        "point_in_triangle_tests",
+        "ear_evaluations",
+        "ear_reevaluations",
+        "ears_inserted",
+        "ears_popped",
+        "tie_breaks",
+        "swap_attempts",
+        "flips",
+    )
+    PHASES = ("preprocess", "initial_scan", "clipping", "swapping", "schedule")
+
+    __slots__ = COUNTERS + ("phases",)
+
+    def __init__(self):
+        for name in self.COUNTERS:
+            setattr(self, name, 0)
+        self.phases = dict.fromkeys(self.PHASES, 0.0)
+
+    @contextmanager
+    def phase(self, name):
+        """Acumula el tiempo de pared del bloque en la fase `name`"""
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] += perf_counter() - start
+
+    def counting(self, fn, counter):
+        """Envuelve `fn` para que cada llamada sume uno a `counter`"""
+        def counted(*args):
+            setattr(self, counter, getattr(self, counter) + 1)
+            return fn(*args)
+        return counted
+
+    def as_dict(self):
+        """Contadores y tiempos (en segundos, con sufijo _s) en un diccionario plano"""
+        out = {name: getattr(self, name) for name in self.COUNTERS}
+        out.update((f"{name}_s", seconds) for name, seconds in self.phases.items())
+        return out
+
+    def lines(self):
+        """Resumen corto para el panel de información"""
+        ms = {name: seconds * 1000 for name, seconds in self.phases.items()}
+        return (
+            f"Pruebas punto-triángulo: {self.point_in_triangle_tests}",
+            f"Evaluaciones de orejas: {self.ear_evaluations} ({self.ear_reevaluations} re)",
+            f"SortedDict ins/pop: {self.ears_inserted}/{self.ears_popped}",
+            f"Desempates: {self.tie_breaks}",
+            f"Swaps intentados/hechos: {self.swap_attempts}/{self.flips}",
+            f"Preproceso: {ms['preprocess']:.1f} ms",
+            f"Barrido inicial: {ms['initial_scan']:.1f} ms",
+            f"Recorte: {ms['clipping']:.1f} ms",
+            f"Swapping: {ms['swapping']:.1f} ms",
+            f"Plan de animación: {ms['schedule']:.1f} ms",
+        )
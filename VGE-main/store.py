@@ -0,0 +1,245 @@
+import mmap
+import struct
+import sys
+from argparse import ArgumentParser
+from array import array
+from time import perf_counter
+
+import vectorized
+from formats import READERS, EXTENSIONS
+
+# Almacén binario de polígonos para entradas enormes, pensado para abrirse con
+# mmap: una cabecera y bloques contiguos (alineados a 64 bytes) con las
+# coordenadas intercaladas x0, y0, x1, y1, ... (float64 o int32), los offsets
+# de anillos y de polígonos (int64, como en parallel.triangulate_buffers) y,
+# opcionalmente, la salida: el lugar reservado de cada polígono, la cantidad
+# de triángulos escritos (-1 si todavía no se triangularon) y los índices de
+# los triángulos (uint32 sobre las coordenadas). Todo es little-endian.
+
+STORE_MAGIC = b"VGEM"
+STORE_VERSION = 1
+
+# magia, versión, tipo de coordenada ("d" o "i"), si tiene salida, vértices,
+# anillos, polígonos, triángulos reservados y el inicio de cada bloque
+_HEADER = struct.Struct("<4sHc?QQQQ6Q")
+_ALIGN = 64
+_BLOCKS = ("coords", "rings", "polygons", "slots", "counts", "triangles")
+
+def _aligned(offset):
+    return -(-offset // _ALIGN) * _ALIGN
+
+def _pad(f):
+    f.write(bytes(_aligned(f.tell()) - f.tell()))
+
+def _write_array(f, data):
+    if sys.byteorder != "little":
+        data = array(data.typecode, data)
+        data.byteswap()
+    data.tofile(f)
+
+def triangle_slots(ring_offsets, polygon_offsets):
+    """Lugar reservado para los triángulos de cada polígono, como offsets acumulados.
+
+    Un polígono con n vértices en total y h huecos tiene como máximo
+    n + 2 h - 2 triángulos; la limpieza solo puede achicarlo. Los del
+    polígono p van en [slots[p], slots[p + 1])."""
+    polygon_count = len(polygon_offsets) - 1
+    slots = array("q", [0]) * (polygon_count + 1)
+    for p in range(polygon_count):
+        first_ring = polygon_offsets[p]
+        last_ring = polygon_offsets[p + 1]
+        vertices = ring_offsets[last_ring] - ring_offsets[first_ring]
+        holes = max(last_ring - first_ring - 1, 0)
+        slots[p + 1] = slots[p] + max(vertices + 2 * holes - 2, 0)
+    return slots
+
+def write_store(path, records, coord_type="d", triangles=True):
+    """Escribe los (id, anillos) de `records` (ver formats) en un almacén.
+
+    Las coordenadas se copian al archivo a medida que llegan, así que solo
+    los offsets se guardan en memoria. Los ids no se guardan: los polígonos
+    se identifican por su posición. Con `coord_type="i"` las coordenadas se
+    guardan como int32 y deben ser enteras. Con `triangles` se reserva el
+    bloque de salida (n + 2 h - 2 triángulos por polígono, sin ocupar disco
+    hasta que se escribe). Devuelve la cantidad de polígonos."""
+    if coord_type not in ("d", "i"):
+        raise ValueError(f"tipo de coordenada no soportado: {coord_type}")
+    ring_offsets = array("q", [0])
+    polygon_offsets = array("q", [0])
+    with open(path, "wb") as f:
+        f.write(bytes(_aligned(_HEADER.size)))
+        coords_start = f.tell()
+        for _, rings in records:
+            for ring in rings:
+                values = [c for p in ring for c in (p[0], p[1])]
+                if coord_type == "i":
+                    integers = [int(c) for c in values]
+                    if integers != values:
+                        raise ValueError("las coordenadas int32 deben ser enteras")
+                    values = integers
+                _write_array(f, array(coord_type, values))
+                ring_offsets.append(ring_offsets[-1] + len(ring))
+            polygon_offsets.append(len(ring_offsets) - 1)
+        ring_count = len(ring_offsets) - 1
+        polygon_count = len(polygon_offsets) - 1
+
+        if triangles:
+            slots = triangle_slots(ring_offsets, polygon_offsets)
+        else:
+            slots = array("q", [0]) * (polygon_count + 1)
+
+        starts = [coords_start]
+        for data in (ring_offsets, polygon_offsets, slots, array("q", [-1]) * polygon_count if triangles else array("q")):
+            _pad(f)
+            starts.append(f.tell())
+            _write_array(f, data)
+        _pad(f)
+        starts.append(f.tell())
+        # el bloque de triángulos queda ralo: el sistema no ocupa las páginas que nadie escribe
+        f.truncate(starts[-1] + 12 * slots[-1])
+        f.seek(0)
+        f.write(_HEADER.pack(STORE_MAGIC, STORE_VERSION, coord_type.encode(), triangles, ring_offsets[-1], ring_count,
+                             polygon_count, slots[-1], *starts))
+    return polygon_count
+
+class PolygonStore:
+    """Almacén abierto con mmap: sus bloques se leen (y la salida se escribe) sin copiarlos.
+
+    `coords`, `ring_offsets`, `polygon_offsets`, `slots`, `counts` y
+    `triangles` son memoryview sobre el archivo, así que abrirlo cuesta lo
+    mismo para cualquier tamaño y el sistema solo lee las páginas que se
+    tocan. Con `writable` los triángulos que se escriben en `triangles` y
+    `counts` van directo al archivo. `arrays()` devuelve los mismos bloques
+    como numpy.memmap. Hay que llamar a close() (o usarlo en un `with`) sin
+    vistas externas vivas."""
+
+    def __init__(self, path, writable=False):
+        if sys.byteorder != "little":
+            raise ValueError("el almacén solo se puede abrir sin copiar en máquinas little-endian")
+        self.path = path
+        self.writable = writable
+        self.file = open(path, "r+b" if writable else "rb")
+        try:
+            header = self.file.read(_HEADER.size)
+            if len(header) < _HEADER.size or header[:len(STORE_MAGIC)] != STORE_MAGIC:
+                raise ValueError(f"{path} no es un almacén de polígonos")
+            (_, version, coord_type, self.has_output, self.vertex_count, self.ring_count, self.polygon_count,
+             self.capacity, *starts) = _HEADER.unpack(header)
+            if version != STORE_VERSION:
+                raise ValueError(f"{path}: versión de almacén no soportada: {version}")
+            self.coord_type = coord_type.decode()
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+        except BaseException:
+            self.file.close()
+            raise
+        self.starts = dict(zip(_BLOCKS, starts))
+        self.layout = {
+            "coords": (self.coord_type, 2 * self.vertex_count),
+            "rings": ("q", self.ring_count + 1),
+            "polygons": ("q", self.polygon_count + 1),
+            "slots": ("q", self.polygon_count + 1),
+            "counts": ("q", self.polygon_count if self.has_output else 0),
+            "triangles": ("I", 3 * self.capacity),
+        }
+        view = memoryview(self.map)
+        self.views = {}
+        for key, (typecode, length) in self.layout.items():
+            start = self.starts[key]
+            self.views[key] = view[start:start + length * array(typecode).itemsize].cast(typecode)
+        view.release()
+        self.coords = self.views["coords"]
+        self.ring_offsets = self.views["rings"]
+        self.polygon_offsets = self.views["polygons"]
+        self.slots = self.views["slots"]
+        self.counts = self.views["counts"]
+        self.triangles = self.views["triangles"]
+
+    def __len__(self):
+        return self.polygon_count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self.map.closed:
+            return
+        for view in self.views.values():
+            view.release()
+        self.map.close()
+        self.file.close()
+
+    def flush(self):
+        self.map.flush()
+
+    def arrays(self):
+        """Los bloques como numpy.memmap (solo lectura salvo con `writable`), por nombre"""
+        np = vectorized.np
+        mode = "r+" if self.writable else "r"
+        dtypes = {"d": "<f8", "i": "<i4", "q": "<i8", "I": "<u4"}
+        out = {}
+        for key, (typecode, length) in self.layout.items():
+            if length:
+                out[key] = np.memmap(self.path, dtypes[typecode], mode, self.starts[key], (length,))
+            else:
+                out[key] = np.empty(0, dtypes[typecode])
+        out["coords"] = out["coords"].reshape(-1, 2)
+        out["triangles"] = out["triangles"].reshape(-1, 3)
+        return out
+
+    def rings(self, p):
+        """Anillos del polígono p como listas de tuplas (x, y); solo se leen sus páginas"""
+        coords = self.coords
+        rings = []
+        for r in range(self.polygon_offsets[p], self.polygon_offsets[p + 1]):
+            ring = coords[2 * self.ring_offsets[r]:2 * self.ring_offsets[r + 1]]
+            rings.append(list(zip(ring[0::2].tolist(), ring[1::2].tolist())))
+        return rings
+
+    def records(self):
+        """(índice, anillos) de cada polígono, como los lectores de formats"""
+        for p in range(self.polygon_count):
+            yield p, self.rings(p)
+
+    def polygon_triangles(self, p):
+        """Triángulos ya escritos del polígono p (tripletas de índices sobre `coords`), o None"""
+        if not self.has_output or self.counts[p] < 0:
+            return None
+        start = 3 * self.slots[p]
+        indices = self.triangles[start:start + 3 * self.counts[p]].tolist()
+        return list(zip(indices[0::3], indices[1::3], indices[2::3]))
+
+    def write_triangles(self, p, triangles):
+        """Escribe en el archivo los triángulos del polígono p, con índices locales a sus anillos"""
+        if not self.has_output or len(triangles) > self.slots[p + 1] - self.slots[p]:
+            raise ValueError(f"polígono {p}: no entran {len(triangles)} triángulos en el lugar reservado")
+        base = self.ring_offsets[self.polygon_offsets[p]]
+        start = 3 * self.slots[p]
+        self.triangles[start:start + 3 * len(triangles)] = array("I", [base + i for triangle in triangles for i in triangle])
+        self.counts[p] = len(triangles)
+
+def read_store(path):
+    """Lector de almacenes con la misma forma que los de formats"""
+    with PolygonStore(path) as store:
+        yield from store.records()
+
+def main():
+    parser = ArgumentParser(description="Convierte polígonos a un almacén binario para abrirlo con mmap.")
+    parser.add_argument("input", help="Archivo de entrada (WKT, GeoJSON, CSV id,x,y o binario).")
+    parser.add_argument("output", help="Almacén de salida.")
+    parser.add_argument("--format", choices=list(READERS), help="Formato de entrada (por defecto, según la extensión).")
+    parser.add_argument("--int32", action="store_true", help="Guarda las coordenadas como int32 (deben ser enteras).")
+    parser.add_argument("--no-triangles", action="store_true", help="No reserva el bloque de salida.")
+    args = parser.parse_args()
+
+    fmt = args.format or EXTENSIONS.get(args.input[args.input.rfind("."):].lower())
+    if fmt is None:
+        parser.error("no se reconoce la extensión de la entrada; use --format")
+    start = perf_counter()
+    count = write_store(args.output, READERS[fmt](args.input), "i" if args.int32 else "d", not args.no_triangles)
+    print(f"{count} polígonos en {perf_counter() - start:.3f} s", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+import math
+
+from sortedcontainers import SortedDict, SortedList
+from point import Point
+
+# Tolerancia relativa para decidir que un punto está sobre un segmento.
+TOLERANCE = 1e-9
+
+def _tol(y):
+    return TOLERANCE * max(1.0, abs(y))
+
+class SweepState:
+    """Posición actual de la línea de barrido, compartida por todos los segmentos"""
+    __slots__ = ("x", "y")
+
+    def __init__(self):
+        self.x = 0
+        self.y = 0
+
+class Probe:
+    """Marcador para buscar con bisect la posición de un punto en el estado.
+
+    `value` es su coordenada a lo largo del estado: la y en este barrido de
+    izquierda a derecha, la x en el de monotone, que baja de arriba abajo."""
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+class _Segment:
+    """Arista de un anillo orientada de izquierda a derecha ((x, y) lexicográfico).
+
+    El orden entre segmentos depende de la posición de la línea de barrido:
+    se comparan por la `y` en la `x` actual y, si empatan, por la pendiente
+    (el orden justo a la derecha del punto de barrido)."""
+    __slots__ = ("ring", "index", "x1", "y1", "x2", "y2", "slope", "sweep")
+
+    def __init__(self, ring, index, p, q, sweep):
+        if (q[0], q[1]) < (p[0], p[1]):
+            p, q = q, p
+        self.ring = ring
+        self.index = index
+        self.x1, self.y1 = p[0], p[1]
+        self.x2, self.y2 = q[0], q[1]
+        self.slope = math.inf if self.x1 == self.x2 else (self.y2 - self.y1) / (self.x2 - self.x1)
+        self.sweep = sweep
+
+    def sweep_y(self):
+        sweep = self.sweep
+        if self.slope == math.inf:
+            return min(max(sweep.y, self.y1), self.y2)
+        return self.y1 + (sweep.x - self.x1) * self.slope
+
+    def __lt__(self, other):
+        y = self.sweep_y()
+        if other.__class__ is Probe:
+            return y < other.value - _tol(other.value)
+        other_y = other.sweep_y()
+        if abs(y - other_y) > _tol(y):
+            return y < other_y
+        if self.slope != other.slope:
+            return self.slope < other.slope
+        return (self.ring, self.index) < (other.ring, other.index)
+
+def _intersection(a, b):
+    """Punto de intersección de dos segmentos o None (paralelos o disjuntos)"""
+    dx_a = a.x2 - a.x1
+    dy_a = a.y2 - a.y1
+    dx_b = b.x2 - b.x1
+    dy_b = b.y2 - b.y1
+    d = dy_b * dx_a - dx_b * dy_a
+    if d == 0:
+        return None
+    u_a = (dx_b * (a.y1 - b.y1) - dy_b * (a.x1 - b.x1)) / d
+    u_b = (dx_a * (a.y1 - b.y1) - dy_a * (a.x1 - b.x1)) / d
+    if 0 <= u_a <= 1 and 0 <= u_b <= 1:
+        return (a.x1 + u_a * dx_a, a.y1 + u_a * dy_a)
+    return None
+
+def _clean_ring(ring):
+    """Quita los vértices consecutivos repetidos (incluido el cierre)"""
+    out = []
+    for p in ring:
+        if not out or (p[0], p[1]) != (out[-1][0], out[-1][1]):
+            out.append(p)
+    while len(out) > 1 and (out[0][0], out[0][1]) == (out[-1][0], out[-1][1]):
+        out.pop()
+    return out
+
+class _Sweep:
+    """Barrido de Bentley–Ottmann sobre las aristas de uno o varios anillos"""
+
+    def __init__(self, rings):
+        self.state = SweepState()
+        self.ring_sizes = []
+        self.shared = {}
+        self.events = SortedDict()
+        for r, ring in enumerate(rings):
+            ring = _clean_ring(ring)
+            size = len(ring)
+            self.ring_sizes.append(size)
+            if size < 3:
+                continue
+            for k in range(size):
+                p = ring[k]
+                q = ring[(k + 1) % size]
+                segment = _Segment(r, k, p, q, self.state)
+                self.events.setdefault((segment.x1, segment.y1), []).append(segment)
+                self.events.setdefault((segment.x2, segment.y2), [])
+                # vértice compartido entre la arista k y la k+1
+                self.shared[(r, k)] = (q[0], q[1])
+
+    def _adjacent_at(self, a, b, p):
+        """True si a y b son aristas consecutivas del mismo anillo que se tocan en su vértice común p"""
+        if a.ring != b.ring:
+            return False
+        size = self.ring_sizes[a.ring]
+        if b.index == (a.index + 1) % size:
+            return self.shared[(a.ring, a.index)] == p
+        if a.index == (b.index + 1) % size:
+            return self.shared[(b.ring, b.index)] == p
+        return False
+
+    def _adjacent(self, a, b):
+        if a.ring != b.ring:
+            return False
+        size = self.ring_sizes[a.ring]
+        return b.index == (a.index + 1) % size or a.index == (b.index + 1) % size
+
+    def _check(self, a, b, p):
+        """Programa la intersección de dos vecinos si está a la derecha de p"""
+        if self._adjacent(a, b):
+            # solo se tocan en el vértice común o se solapan, lo que se detecta en los extremos
+            return
+        q = _intersection(a, b)
+        if q is None or q <= p:
+            return
+        if abs(q[0] - p[0]) <= _tol(p[0]) and abs(q[1] - p[1]) <= _tol(p[1]):
+            return
+        if q not in self.events:
+            self.events[q] = []
+
+    def run(self, first_only=False):
+        state = self.state
+        events = self.events
+        status = SortedList()
+        found = []
+        reported = set()
+        while events:
+            p, upper = events.popitem(0)
+            state.x, state.y = p
+
+            # segmentos del estado que contienen a p; son contiguos
+            i = status.bisect_left(Probe(p[1]))
+            j = i
+            while j < len(status) and abs(status[j].sweep_y() - p[1]) <= _tol(p[1]):
+                j += 1
+            containing = status[i:j]
+
+            involved = upper + containing
+            if len(involved) > 1 and p not in reported:
+                if any(not self._adjacent_at(a, b, p)
+                       for k, a in enumerate(involved) for b in involved[k + 1:]):
+                    reported.add(p)
+                    found.append(Point(*p))
+                    if first_only:
+                        return found
+
+            del status[i:j]
+            inserted = upper + [s for s in containing if (s.x2, s.y2) != p]
+            for segment in inserted:
+                status.add(segment)
+
+            if not inserted:
+                if 0 < i < len(status):
+                    self._check(status[i - 1], status[i], p)
+            else:
+                lo = i
+                hi = i + len(inserted) - 1
+                if lo > 0:
+                    self._check(status[lo - 1], status[lo], p)
+                if hi + 1 < len(status):
+                    self._check(status[hi], status[hi + 1], p)
+        return found
+
+def find_intersections(polygon, first_only=False, holes=None):
+    """Devuelve los puntos donde se cortan o tocan aristas del polígono en O((n + k) log n).
+
+    Las aristas consecutivas solo pueden compartir su vértice común. Los
+    `holes` se barren junto con el exterior, así que también se informan los
+    cruces y contactos entre anillos distintos. Con `first_only=True` se
+    detiene en el primer cruce encontrado."""
+    return _Sweep([polygon] + list(holes or ())).run(first_only=first_only)
+
+def is_simple(polygon, holes=None):
+    """True si el polígono (y sus huecos) no tiene autointersecciones"""
+    return not _Sweep([polygon] + list(holes or ())).run(first_only=True)
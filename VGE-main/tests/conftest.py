@@ -0,0 +1,5 @@
+import os
+import sys
+
+# los módulos del proyecto se importan como scripts sueltos desde VGE-main
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
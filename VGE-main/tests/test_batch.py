@@ -0,0 +1,35 @@
+import io
+
+import pytest
+
+import batch
+from batch import triangulate_records
+from formats import BinaryTriangleWriter, read_csv
+
+SQUARE = [(0, 0), (10, 0), (10, 10), (0, 10)]
+
+def test_invalid_polygons_are_reported():
+    errors = []
+    records = [("a", [SQUARE]), ("b", [[(0, 0), (1, 1)]]), ("c", [[(0, 0), (1,), (2, 2)]])]
+    results = list(triangulate_records(records, on_error=lambda record_id, e: errors.append(record_id)))
+    assert [r[0] for r in results] == ["a"]
+    assert errors == ["b", "c"]
+
+def test_engine_errors_are_not_swallowed(monkeypatch):
+    def broken(*args, **kwargs):
+        raise KeyError("bug")
+    monkeypatch.setattr(batch, "triangulate", broken)
+    with pytest.raises(KeyError):
+        list(triangulate_records([("a", [SQUARE])], on_error=lambda record_id, e: None))
+
+def test_csv_short_row(tmp_path):
+    path = tmp_path / "polygons.csv"
+    path.write_text("id,x,y\n1,0,0\n1,1\n")
+    with pytest.raises(ValueError, match="línea 3"):
+        list(read_csv(path))
+
+def test_binary_writer_rejects_negative_ids():
+    writer = BinaryTriangleWriter(io.BytesIO())
+    writer.write("7", [(0, 1, 2)])
+    with pytest.raises(ValueError):
+        writer.write(-1, [(0, 1, 2)])
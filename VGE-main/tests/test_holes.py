@@ -0,0 +1,30 @@
+import random
+
+from benchmarks import star
+from triangulation import triangulate
+
+def _area(ring):
+    return abs(sum(a[0] * b[1] - b[0] * a[1] for a, b in zip(ring, ring[1:] + ring[:1]))) / 2
+
+def _check(outer, holes):
+    triangles = triangulate(outer, holes=holes)
+    assert len(triangles) == len(outer) + sum(len(hole) for hole in holes) + 2 * len(holes) - 2
+    expected = _area(outer) - sum(_area(hole) for hole in holes)
+    assert abs(sum(_area(list(t)) for t in triangles) - expected) <= 1e-9 * _area(outer)
+
+def test_bridge_does_not_cross_a_notch_of_the_outer_ring():
+    # el puente desde el hueco no puede ir a (100, 0): cruzaría la muesca en (55, 35)
+    _check([(0, 0), (50, 0), (55, 35), (60, 0), (100, 0), (100, 100), (0, 100)],
+           [[(20, 40), (40, 40), (40, 60), (20, 60)]])
+
+def test_holes_inside_star_shaped_outer_rings():
+    rng = random.Random(7)
+    for seed in range(60):
+        outer = [(1000 * x, 1000 * y) for x, y in star(rng.randrange(8, 60), seed)]
+        # la estrella contiene el disco de radio 0.1 alrededor del centro
+        holes = []
+        for k in range(rng.randrange(1, 4)):
+            x = 430 + 50 * k
+            y = 470 + rng.uniform(-20, 20)
+            holes.append([(x, y), (x + 20, y + rng.uniform(-5, 5)), (x + 15, y + 30), (x, y + 25)])
+        _check(outer, holes)
@@ -0,0 +1,66 @@
+import math
+import random
+
+import pytest
+
+import predicates
+import vectorized
+from benchmarks import random_walk, star
+from preprocess import clean_ring
+from triangulation import triangulate
+
+np = vectorized.np
+needs_numpy = pytest.mark.skipif(not vectorized.available(), reason="NumPy no está instalado")
+
+def _integer_polygon(generator, n, factor):
+    return [(int(x * factor), int(y * factor)) for x, y in generator(n)]
+
+@needs_numpy
+@pytest.mark.parametrize("factor", [10 ** 3, 10 ** 10, 10 ** 12, 2 ** 40, 10 ** 18])
+def test_orient2d_matches_scalar_predicate(factor):
+    rng = random.Random(factor)
+    points = [(rng.randrange(-factor, factor), rng.randrange(-factor, factor)) for _ in range(300)]
+    # la mitad, casi colineales: el tercer punto sobre la recta de los dos primeros, corrido en uno
+    for k in range(0, 300, 6):
+        (ax, ay), (bx, by) = points[k], points[k + 1]
+        points[k + 2] = (2 * bx - ax, 2 * by - ay + (k % 2))
+    coords = np.array(points, dtype=np.int64).reshape(-1, 3, 2)
+    got = vectorized.orient2d(coords[:, 0], coords[:, 1], coords[:, 2])
+    expected = [predicates.orient2d(*a, *b, *c) for a, b, c in coords.tolist()]
+    assert [(v > 0) - (v < 0) for v in got.tolist()] == [(v > 0) - (v < 0) for v in expected]
+
+@needs_numpy
+@pytest.mark.parametrize("generator, factor", [(star, 10 ** 12), (random_walk, 10 ** 10)])
+def test_clockwise_criterion_and_points_in_triangle_are_exact(generator, factor):
+    polygon = _integer_polygon(generator, 200, factor)
+    coords = np.array(polygon, dtype=np.int64)
+    criterion = sum((x1 - x0) * (y1 + y0) for (x0, y0), (x1, y1) in zip(polygon, polygon[1:] + polygon[:1]))
+    assert vectorized.clockwise_criterion(coords) == criterion
+
+    # misma expresión que EarClipping._in_triangle, con enteros de Python
+    v0, v1, v2 = polygon[0], polygon[70], polygon[140]
+    (x0, y0), (x1, y1), (x2, y2) = v0, v1, v2
+    d = (y1 - y2) * (x0 - x2) + (x2 - x1) * (y0 - y2)
+    expected = []
+    for x, y in polygon:
+        s = (y1 - y2) * (x - x2) + (x2 - x1) * (y - y2)
+        t = (y2 - y0) * (x - x2) + (x0 - x2) * (y - y2)
+        expected.append(s <= 0 and t <= 0 and (s + t >= d if d < 0 else s + t <= d))
+    assert vectorized.points_in_triangle(coords, v0, v1, v2).tolist() == expected
+
+@pytest.mark.parametrize("generator, factor", [(star, 10 ** 12), (random_walk, 10 ** 10), (star, 10 ** 25)])
+@pytest.mark.parametrize("edge_swapping", [False, True])
+def test_triangulate_large_integers_matches_scalar_path(monkeypatch, generator, factor, edge_swapping):
+    polygon = _integer_polygon(generator, 200, factor)
+    triangles = triangulate(polygon, edge_swapping=edge_swapping, indices=True)
+    assert len(triangles) == len(polygon) - 2
+    # sin NumPy todo se calcula con enteros de Python: el resultado no puede cambiar
+    monkeypatch.setattr(vectorized, "np", None)
+    assert triangulate(polygon, edge_swapping=edge_swapping, indices=True) == triangles
+
+def test_clean_ring_removes_collinear_integers_beyond_float_precision():
+    # (a, 1) está alineado con (0, 0) y (3 a, 3), pero no después de redondear a float64
+    a = 2 ** 62 + 999
+    arc = [(int(3 * a * math.cos(t * math.pi / 60)), 3 + int(3 * a * math.sin(t * math.pi / 60))) for t in range(1, 60)]
+    ring = [(0, 0), (a, 1), (3 * a, 3)] + arc
+    assert clean_ring(ring) == [0] + list(range(2, len(ring)))
@@ -0,0 +1,28 @@
+import pytest
+
+from benchmarks import GENERATORS, scale
+from mesh import TriangleMesh
+from stats import TriangulationStats
+from triangulation import EarClipping
+
+# Cuentas de operaciones en vez de tiempos: no dependen de la máquina.
+
+@pytest.mark.parametrize("name", ["spiral", "near_collinear", "comb"])
+def test_edge_swapping_flips_stay_linear(name):
+    n = 20000
+    stats = TriangulationStats()
+    EarClipping(scale(GENERATORS[name](n), 1000, 600), edge_swapping=True, stats=stats).run_indices()
+    # antes la espiral necesitaba más de un millón de flips y near_collinear más de cinco
+    assert stats.flips <= n
+    assert stats.swap_attempts <= 10 * n
+
+@pytest.mark.parametrize("name", list(GENERATORS))
+def test_edge_swapping_result_is_delaunay(name):
+    ear_clipping = EarClipping(scale(GENERATORS[name](3000), 1000, 600), edge_swapping=True)
+    mesh = TriangleMesh()
+    for triangle in ear_clipping.run_indices():
+        mesh.add_triangle(*triangle)
+    for (u, v), t in mesh.half_edges.items():
+        s = mesh.neighbour(u, v)
+        if s is not None:
+            assert not ear_clipping._is_illegal(u, v, mesh.opposite(t, u, v), mesh.opposite(s, u, v))
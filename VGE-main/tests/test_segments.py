@@ -0,0 +1,55 @@
+import random
+
+import pytest
+
+import chain
+import predicates
+import vectorized
+from chain import ChainValidator, segment_contact
+
+np = vectorized.np
+
+needs_numpy = pytest.mark.skipif(not vectorized.available(), reason="NumPy no está instalado")
+
+def _segments(rng, count, factor):
+    # coordenadas en una grilla chica: abundan los contactos en extremos y los colineales
+    return [[(rng.randint(0, 8) * factor, rng.randint(0, 8) * factor) for _ in range(2)] for _ in range(count)]
+
+@needs_numpy
+@pytest.mark.parametrize("factor", [1, 0.1, 2 ** 40, 2 ** 70])
+def test_segment_intersections_matches_segment_contact(factor):
+    rng = random.Random(5)
+    a = _segments(rng, 40, factor)
+    b = _segments(rng, 60, factor)
+    mask, points = vectorized.segment_intersections(np.array([s[0] for s in a]), np.array([s[1] for s in a]),
+                                                    np.array([s[0] for s in b]), np.array([s[1] for s in b]))
+    for i, ((ax, ay), (bx, by)) in enumerate(a):
+        for j, ((cx, cy), (dx, dy)) in enumerate(b):
+            contact = segment_contact(ax, ay, bx, by, cx, cy, dx, dy)
+            assert mask[i, j] == (contact is not None)
+            if contact is not None and not np.isnan(points[i, j, 0]):
+                assert points[i, j] == pytest.approx((contact.x, contact.y), rel=1e-9, abs=1e-9 * factor)
+
+@needs_numpy
+def test_collinear_matches_scalar_predicate():
+    rng = random.Random(2)
+    triples = [[(rng.randint(0, 4), rng.randint(0, 4)) for _ in range(3)] for _ in range(500)]
+    p1, p2, p3 = (np.array([t[k] for t in triples]) for k in range(3))
+    expected = [predicates.collinear(*t[0], *t[1], *t[2]) for t in triples]
+    assert vectorized.collinear(p1, p2, p3).tolist() == expected
+
+@needs_numpy
+def test_chain_validator_batches_match_scalar_path(monkeypatch):
+    monkeypatch.setattr(chain, "_BATCH_THRESHOLD", 1)
+    rng = random.Random(9)
+    for _ in range(20):
+        points = [(rng.randint(0, 40) * 25, rng.randint(0, 40) * 25) for _ in range(150)]
+        batched = ChainValidator(0, 0, 1000, 1000, capacity=4)
+        batched.extend(points)
+        with monkeypatch.context() as m:
+            m.setattr(vectorized, "np", None)
+            scalar = ChainValidator(0, 0, 1000, 1000, capacity=4)
+            scalar.extend(points)
+        assert batched.valid == scalar.valid
+        key = lambda p: (p.x, p.y)
+        assert sorted(batched.crossings(), key=key) == sorted(scalar.crossings(), key=key)
@@ -0,0 +1,383 @@
+import math
+from time import perf_counter
+
+from sortedcontainers import SortedDict
+import predicates
+import quality
+import vectorized
+from grid import PointGrid
+from holes import merge_holes
+from mesh import TriangleMesh
+from ring import VertexRing
+from stats import Suspendable
+
+
+class EarClipping(Suspendable):
+    """Triangulación por recorte de orejas sin ninguna dependencia de dibujo.
+
+    Trabaja sobre un VertexRing: los vértices se identifican por su índice.
+    Si se pasa un `recorder`, se le notifican los pasos del algoritmo
+    (ver EarClippingAnim) para poder animarlos. Con `stats` (un
+    TriangulationStats) se cuentan las operaciones internas y se mide cada
+    fase; sin él, el camino caliente no cambia.
+
+    Los `holes` (anillos interiores) se unen al exterior con aristas puente
+    antes de recortar; `source` da entonces, para cada índice del anillo, el
+    índice del vértice en la concatenación de `vertices` y `holes`."""
+
+    def __init__(self, vertices, edge_swapping=False, recorder=None, stats=None, holes=None):
+        if len(vertices) < 3:
+            raise ValueError("vertices should have at least 3 items")
+        start = perf_counter()
+        self.source = None
+        if holes:
+            vertices, self.source = merge_holes(vertices, holes)
+        self.ring = VertexRing(vertices)
+        # Asegura que los vértices del polígono estén en sentido antihorario. Si no, los invierte.
+        self.reversed = not self._is_clockwise(self.ring)
+        if self.reversed:
+            self.ring.reverse()
+            if self.source is not None:
+                self.source.reverse()
+        self.edge_swapping = edge_swapping
+        self.recorder = recorder
+        self.triangles = []
+        self.triangle_indices = []
+        self.mesh = TriangleMesh() if edge_swapping else None
+        self.stats = stats
+        if self.ring.typecode == "d":
+            # con floats la expresión directa puede errar el signo cerca de cero
+            self._orient = self._orient_filtered
+        # NumPy solo cuando sus cuentas son exactas: floats o enteros cuyos productos caben en int64
+        self.vectorize = vectorized.available() and self._fits_vector(self.ring)
+        if stats is not None:
+            # contadores como atributos de la instancia: sin stats no hay ningún costo
+            self._in_triangle = stats.counting(self._in_triangle, "point_in_triangle_tests")
+            self._is_illegal = stats.counting(self._is_illegal, "swap_attempts")
+            stats.phases["preprocess"] += perf_counter() - start
+
+    def run(self):
+        """Recorre el algoritmo y devuelve la lista de triángulos (tuplas de puntos)"""
+        point_of = self.ring.point
+        self.triangles = [(point_of(a), point_of(b), point_of(c)) for a, b, c in self.run_indices()]
+        return self.triangles
+
+    def run_indices(self):
+        """Recorre el algoritmo y devuelve los triángulos como tripletas de índices del anillo"""
+        for _ in self.steps():
+            pass
+        return self.triangle_indices
+
+    def steps(self):
+        """Recorre el algoritmo como generador; los triángulos quedan en `triangle_indices`.
+
+        Con `recorder` se suspende después de cada paso que le notifica (el
+        recorder puede así consumirlos de a uno, ver EarClippingAnim); sin él
+        no se suspende nunca. El tiempo suspendido no cuenta en las fases."""
+        ring = self.ring
+        xs = ring.xs
+        ys = ring.ys
+        prev = ring.prev
+        next = ring.next
+        recorder = self.recorder
+        stats = self.stats
+        n = len(ring)
+        if stats is not None:
+            phase_start = perf_counter()
+            suspended = self.suspended
+
+        if recorder is not None:
+            recorder.start(ring.points())
+            yield from self._suspend()
+
+        if self.vectorize:
+            coords = self._coords(ring)
+            self.coords = coords
+            np = vectorized.np
+            orientations = vectorized.orient2d(np.roll(coords, 1, axis=0), coords, np.roll(coords, -1, axis=0)).tolist()
+        else:
+            orientations = [self._orient(prev[i], i, next[i]) for i in range(n)]
+        # Índice espacial con los vértices reflejos que siguen en el polígono;
+        # solo ellos pueden caer dentro de una oreja candidata. Las celdas se
+        # dimensionan por la cantidad de reflejos y cómo se reparten, no por
+        # la de vértices.
+        reflex = [i for i, orientation in enumerate(orientations) if orientation >= 0]
+        self.reflex = PointGrid.fitted(reflex, lambda i: (xs[i], ys[i]))
+
+        #  Identifica y almacena orejas del polígono.
+        ears = SortedDict()
+        self.ear_key = [None] * n
+        self.tie_keys = {}
+        for i in range(n):
+            self._classify(i, ears)
+            if recorder is not None:
+                yield from self._suspend()
+
+        if stats is not None:
+            now = perf_counter()
+            stats.phases["initial_scan"] += now - phase_start - (self.suspended - suspended)
+            phase_start = now
+            suspended = self.suspended
+            swapping_time = 0.0
+
+        triangles = self.triangle_indices
+        while len(ring) > 2:
+            # seleccionar oreja con ángulo máximo mínimo
+            _, selected_ear = ears.popitem()
+            if stats is not None:
+                stats.ears_popped += 1
+            self.ear_key[selected_ear] = None
+            p = prev[selected_ear]
+            q = next[selected_ear]
+            triangle = (p, selected_ear, q)
+            if recorder is not None:
+                recorder.clip((ring.point(p), ring.point(selected_ear), ring.point(q)))
+
+            if self.mesh is not None:
+                # edge swapping: pasada de Lawson desde las aristas de la oreja recortada
+                self.mesh.add_triangle(*triangle)
+                if stats is not None:
+                    swap_start = perf_counter()
+                flips = self.mesh.legalize(((p, selected_ear), (selected_ear, q), (q, p)), self._is_illegal,
+                                           on_flip=self._record_flip if recorder is not None else None)
+                if stats is not None:
+                    swapping_time += perf_counter() - swap_start
+                    stats.flips += flips
+            else:
+                triangles.append(triangle)
+
+            # actualizar vertices vecinos
+            ring.remove(selected_ear)
+            self.reflex.remove(selected_ear)
+            if len(ring) > 3:
+                for neighbour in (p, q):
+                    key = self.ear_key[neighbour]
+                    if key is not None:
+                        ears.pop(key)
+                        if stats is not None:
+                            stats.ears_popped += 1
+                    # un vértice reflejo puede volverse convexo al perder un vecino, nunca al revés
+                    if self._orient(prev[neighbour], neighbour, next[neighbour]) < 0:
+                        self.reflex.remove(neighbour)
+                    self._classify(neighbour, ears)
+                    if stats is not None:
+                        stats.ear_reevaluations += 1
+                if self.mesh is not None:
+                    # el triángulo de los vecinos de p y q no cambió, pero sí la prueba de _locally_delaunay
+                    for far in (prev[p], next[q]):
+                        key = self.ear_key[far]
+                        if key is not None and far != p and far != q:
+                            ears.pop(key)
+                            if stats is not None:
+                                stats.ears_popped += 1
+                            self._insert_ear(prev[far], far, next[far], ears)
+            if recorder is not None:
+                yield from self._suspend()
+
+        if self.mesh is not None:
+            triangles[:] = self.mesh.triangles
+
+        if stats is not None:
+            stats.phases["clipping"] += perf_counter() - phase_start - (self.suspended - suspended) - swapping_time
+            stats.phases["swapping"] += swapping_time
+
+        if recorder is not None:
+            recorder.finish([ring.point(i) for i in range(n)])
+
+    def _classify(self, i, ears):
+        """Evalúa si el vértice es oreja y lo registra en `ears` con su clave de prioridad"""
+        ring = self.ring
+        p = ring.prev[i]
+        q = ring.next[i]
+        if self.recorder is not None:
+            conflicts = self._get_conflicting(p, i, q)
+            self.recorder.ear_test((ring.point(p), ring.point(i), ring.point(q)), [ring.point(c) for c in conflicts])
+            is_ear = not conflicts and self._orient(p, i, q) <= 0
+        else:
+            is_ear = self._is_ear(p, i, q)
+
+        stats = self.stats
+        if stats is not None:
+            stats.ear_evaluations += 1
+
+        if is_ear:
+            self._insert_ear(p, i, q, ears)
+        else:
+            # marcar como no-oreja
+            self.ear_key[i] = None
+
+    def _insert_ear(self, p, i, q, ears):
+        """Registra la oreja (p, i, q) en `ears`; la clave crece con el ángulo mínimo (ver quality.min_angle_key)"""
+        xs = self.ring.xs
+        ys = self.ring.ys
+        stats = self.stats
+        quality_key = quality.min_angle_key(xs[p], ys[p], xs[i], ys[i], xs[q], ys[q])
+        if self.mesh is not None and self._locally_delaunay(p, i, q):
+            # min_angle_key no pasa de 0.75: estas orejas salen antes que todas las demás
+            quality_key += 1.0
+        # rompe la igualdad: la oreja más reciente sale primero; se sigue desde la
+        # última clave usada con la misma calidad para no recorrer toda la cadena
+        key = self.tie_keys.get(quality_key, quality_key)
+        while key in ears:
+            key = math.nextafter(key, math.inf)
+            if stats is not None:
+                stats.tie_breaks += 1
+        self.tie_keys[quality_key] = key
+        ears[key] = i
+        if stats is not None:
+            stats.ears_inserted += 1
+        self.ear_key[i] = key
+
+    def _locally_delaunay(self, p, i, q):
+        """True si los vecinos de p y q que quedan del otro lado de la diagonal (p, q) caen fuera del circuncírculo.
+
+        Con edge swapping, recortar primero estas orejas evita los abanicos de
+        triángulos finos que la pasada de Lawson tendría que deshacer arista
+        por arista (en una banda larga, una cantidad cuadrática de flips)."""
+        ring = self.ring
+        xs = ring.xs
+        ys = ring.ys
+        side = self._orient(p, q, i)
+        for w in (ring.prev[p], ring.next[q]):
+            if w == p or w == q or self._orient(p, q, w) * side >= 0:
+                continue
+            if quality.is_illegal(xs[p], ys[p], xs[i], ys[i], xs[q], ys[q], xs[w], ys[w]):
+                return False
+        return True
+
+    def _record_flip(self, edge, t1, t2):
+        point_of = self.ring.point
+        self.recorder.swap(tuple(point_of(i) for i in edge), tuple(point_of(i) for i in t1), tuple(point_of(i) for i in t2))
+
+    def _is_illegal(self, u, v, w, x):
+        """Condición de Delaunay: la arista (u, v) es ilegal si x está dentro del circuncírculo de (u, v, w)"""
+        xs = self.ring.xs
+        ys = self.ring.ys
+        return quality.is_illegal(xs[u], ys[u], xs[v], ys[v], xs[w], ys[w], xs[x], ys[x])
+
+    def _is_ear(self, i0, i1, i2):
+        if self._orient(i0, i1, i2) > 0:
+            return False
+        # recorrido escalar, celda por celda: suele terminar en el primer conflicto
+        for cell in self._reflex_cells(i0, i1, i2):
+            for i in cell:
+                if self._in_triangle(i, i0, i1, i2):
+                    return False
+        return True
+
+    def _get_conflicting(self, i0, i1, i2):
+        """Índices de los vértices reflejos que caen dentro del triángulo"""
+        conflicts = []
+
+        if self._orient(i0, i1, i2) > 0:
+            return conflicts
+
+        candidates = [i for cell in self._reflex_cells(i0, i1, i2) for i in cell]
+        if len(candidates) >= vectorized.VECTOR_THRESHOLD and self.vectorize:
+            xs = self.ring.xs
+            ys = self.ring.ys
+            if self.stats is not None:
+                self.stats.point_in_triangle_tests += len(candidates)
+            mask = vectorized.points_in_triangle(self.coords[candidates], (xs[i0], ys[i0]), (xs[i1], ys[i1]),
+                                                 (xs[i2], ys[i2]), exclude_corners=True)
+            return [candidates[k] for k in vectorized.np.flatnonzero(mask)]
+
+        for i in candidates:
+            if self._in_triangle(i, i0, i1, i2):
+                conflicts.append(i)
+        return conflicts
+
+    def _reflex_cells(self, i0, i1, i2):
+        """Celdas con vértices reflejos que toca el triángulo (no toda su caja envolvente)"""
+        xs = self.ring.xs
+        ys = self.ring.ys
+        return self.reflex.query_triangle((xs[i0], ys[i0]), (xs[i1], ys[i1]), (xs[i2], ys[i2]))
+
+    def _in_triangle(self, i, i0, i1, i2):
+        """True si el vértice i está dentro del triángulo y no coincide con ninguna de sus esquinas"""
+        xs = self.ring.xs
+        ys = self.ring.ys
+        x = xs[i]
+        y = ys[i]
+        x0, y0 = xs[i0], ys[i0]
+        x1, y1 = xs[i1], ys[i1]
+        x2, y2 = xs[i2], ys[i2]
+        dx = x-x2
+        dy = y-y2
+        dx21 = x2-x1
+        dy12 = y1-y2
+        dx02 = x0 - x2
+        dy02 = y0 - y2
+        dy20 = y2-y0
+        d = dy12*dx02 + dx21*dy02
+        s = dy12*dx + dx21*dy
+        t = dy20*dx + dx02*dy
+        if d < 0:
+            inside = s <= 0 and t <= 0 and s+t >= d
+        else:
+            inside = s <= 0 and t <= 0 and s+t <= d
+        return inside and not (x == x0 and y == y0) and not (x == x1 and y == y1) and not (x == x2 and y == y2)
+
+    def _orient(self, a, b, c):
+        xs = self.ring.xs
+        ys = self.ring.ys
+        return (xs[a]-xs[c])*(ys[b]-ys[c])-(xs[b]-xs[c])*(ys[a]-ys[c])
+
+    def _orient_filtered(self, a, b, c):
+        """_orient para anillos con floats: el filtro de predicates.orient2d en línea"""
+        xs = self.ring.xs
+        ys = self.ring.ys
+        detleft = (xs[a]-xs[c])*(ys[b]-ys[c])
+        detright = (xs[b]-xs[c])*(ys[a]-ys[c])
+        det = detleft - detright
+        bound = predicates.ORIENT_ERROR_BOUND * (abs(detleft) + abs(detright))
+        if det > bound or -det > bound:
+            return det
+        return predicates.orient2d_exact(xs[a], ys[a], xs[b], ys[b], xs[c], ys[c])
+
+    @staticmethod
+    def _fits_vector(ring):
+        if ring.typecode == "d":
+            return True
+        if ring.typecode is None or not len(ring):
+            return False
+        return max(max(ring.xs), -min(ring.xs), max(ring.ys), -min(ring.ys)) <= vectorized.INT64_SAFE
+
+    @staticmethod
+    def _coords(ring):
+        """Arreglo (N, 2) de NumPy sobre los arreglos del anillo"""
+        np = vectorized.np
+        return np.column_stack((np.frombuffer(ring.xs, dtype=ring.typecode), np.frombuffer(ring.ys, dtype=ring.typecode)))
+
+    def _is_clockwise(self, ring):
+        """ Determinar si un polígono está orientado en sentido horario."""
+        xs = ring.xs
+        ys = ring.ys
+        if len(ring) >= vectorized.VECTOR_THRESHOLD and vectorized.available() and ring.typecode is not None:
+            # la suma exacta: clockwise_criterion pasa a enteros de Python si int64 no alcanza
+            return vectorized.clockwise_criterion(self._coords(ring)) > 0
+        criterion = 0
+        vertex_count = len(ring)
+        for a in range(0, vertex_count ):
+            b = (a + 1) % vertex_count
+            criterion += (xs[b] - xs[a])*(ys[b] + ys[a])
+
+        return criterion > 0
+
+
+def triangulate(vertices, edge_swapping=False, indices=False, stats=None, holes=None):
+    """Triangula un polígono simple, opcionalmente con huecos, sin construir ninguna animación.
+
+    Devuelve la lista de triángulos como tuplas de puntos o, con `indices=True`,
+    como tripletas de índices sobre `vertices` seguidos de los vértices de `holes`."""
+    engine = EarClipping(vertices, edge_swapping=edge_swapping, stats=stats, holes=holes)
+    if not indices:
+        return engine.run()
+    triangles = engine.run_indices()
+    if engine.source is not None:
+        source = engine.source
+        return [(source[a], source[b], source[c]) for a, b, c in triangles]
+    if engine.reversed:
+        last = len(vertices) - 1
+        return [(last - a, last - b, last - c) for a, b, c in triangles]
+    return triangles
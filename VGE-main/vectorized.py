@@ -0,0 +1,160 @@
+# Versiones vectorizadas (NumPy) de los predicados geométricos. Trabajan sobre
+# arreglos (N, 2) de float64 o int64 con una sola llamada por lote. NumPy es
+# opcional: sin él `available()` es False y se usan las versiones escalares.
+from itertools import chain
+
+import predicates
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# A partir de cuántos candidatos compensa pasar a NumPy en lugar de iterar en Python.
+VECTOR_THRESHOLD = 48
+
+# Mayor coordenada entera (en valor absoluto) con la que orient2d y
+# points_in_triangle calculan en int64 sin desbordes.
+INT64_SAFE = 2 ** 29
+
+def available():
+    return np is not None
+
+def _exact(*arrays, terms=16):
+    """Pasa los arreglos enteros a object (enteros de Python) si una suma de
+    `terms` productos de diferencias de sus valores podría desbordar int64"""
+    integers = [a for a in arrays if a.dtype.kind in "iu" and a.size]
+    if not integers:
+        return arrays
+    m = max(max(int(a.max()), -int(a.min())) for a in integers)
+    if 4 * terms * m * m < 2 ** 63:
+        return arrays
+    return tuple(a.astype(object) for a in arrays)
+
+def as_points(points, dtype=None):
+    """Convierte una secuencia de puntos en un arreglo (N, 2) (float64 por defecto)"""
+    if isinstance(points, np.ndarray):
+        return points.reshape(-1, 2) if dtype is None else points.astype(dtype).reshape(-1, 2)
+    # fromiter evita crear un objeto intermedio por punto
+    return np.fromiter(chain.from_iterable(points), dtype or np.float64, 2 * len(points)).reshape(-1, 2)
+
+def orientation(a, b, c):
+    """Orientación de muchas tripletas a la vez; mismo signo que EarClipping._orientation"""
+    a = np.asarray(a)
+    b = np.asarray(b)
+    c = np.asarray(c)
+    return (a[..., 0] - c[..., 0]) * (b[..., 1] - c[..., 1]) - (b[..., 0] - c[..., 0]) * (a[..., 1] - c[..., 1])
+
+def orient2d(a, b, c):
+    """Como orientation(), pero con el signo garantizado (ver predicates.orient2d).
+
+    Con arreglos enteros el resultado es exacto: si las coordenadas son
+    tan grandes que los productos desbordarían int64 se calcula con enteros
+    de Python (dtype object). Con floats, las tripletas cuyo valor no supera
+    la cota de error se recalculan una a una de forma exacta y se reemplazan
+    por su signo."""
+    a, b, c = _exact(np.asarray(a), np.asarray(b), np.asarray(c), terms=2)
+    detleft = (a[..., 0] - c[..., 0]) * (b[..., 1] - c[..., 1])
+    detright = (a[..., 1] - c[..., 1]) * (b[..., 0] - c[..., 0])
+    det = detleft - detright
+    if det.dtype.kind != "f":
+        return det
+    bound = predicates.ORIENT_ERROR_BOUND * (np.abs(detleft) + np.abs(detright))
+    uncertain = np.flatnonzero(np.abs(det) <= bound)
+    if len(uncertain):
+        a, b, c = np.broadcast_arrays(a, b, c)
+        a = a.reshape(-1, 2)
+        b = b.reshape(-1, 2)
+        c = c.reshape(-1, 2)
+        flat = det.reshape(-1)
+        for k in uncertain.tolist():
+            exact = predicates.orient2d_exact(a[k, 0], a[k, 1], b[k, 0], b[k, 1], c[k, 0], c[k, 1])
+            flat[k] = (exact > 0) - (exact < 0)
+    return det
+
+def collinear(p1, p2, p3):
+    """Máscara de tripletas exactamente colineales (equivalente a helpfunctions.collinear)"""
+    return orient2d(p1, p2, p3) == 0
+
+def _sign(values):
+    return (values > 0).astype(np.int8) - (values < 0).astype(np.int8)
+
+def points_in_triangle(points, v0, v1, v2, exclude_corners=False):
+    """Máscara de los puntos dentro (o sobre el borde) del triángulo v0 v1 v2.
+
+    Con `exclude_corners=True` los puntos iguales a un vértice del triángulo
+    cuentan como fuera, igual que en las pruebas de oreja."""
+    points, corners = _exact(np.asarray(points), np.asarray((v0, v1, v2)), terms=4)
+    v0, v1, v2 = corners
+    x = points[:, 0]
+    y = points[:, 1]
+    dx = x - v2[0]
+    dy = y - v2[1]
+    dx21 = v2[0] - v1[0]
+    dy12 = v1[1] - v2[1]
+    dx02 = v0[0] - v2[0]
+    dy02 = v0[1] - v2[1]
+    dy20 = v2[1] - v0[1]
+    d = dy12 * dx02 + dx21 * dy02
+    s = dy12 * dx + dx21 * dy
+    t = dy20 * dx + dx02 * dy
+    if d < 0:
+        mask = (s <= 0) & (t <= 0) & (s + t >= d)
+    else:
+        mask = (s <= 0) & (t <= 0) & (s + t <= d)
+    if exclude_corners:
+        for v in (v0, v1, v2):
+            mask &= (x != v[0]) | (y != v[1])
+    return mask
+
+def segment_intersections(a_start, a_end, b_start, b_end):
+    """Cruza un lote de segmentos contra otro lote.
+
+    Devuelve (mask, points): mask[i, j] indica si el segmento i del primer lote
+    toca al j del segundo y points[i, j] es un punto común en float64 (NaN si
+    no se tocan). La máscara sale de los signos exactos de orient2d, así que,
+    como en chain.segment_contact, cuentan los contactos en un extremo (el
+    punto es ese extremo) y los solapamientos colineales (el punto es NaN y
+    lo elige quien llama)."""
+    a_start = np.asarray(a_start)
+    b_start = np.asarray(b_start)
+    shape = (len(a_start), len(b_start))
+    a_start, a_end, b_start, b_end = (v.reshape(-1, 2) for v in np.broadcast_arrays(
+        a_start[:, None, :], np.asarray(a_end)[:, None, :], b_start[None, :, :], np.asarray(b_end)[None, :, :]))
+    o1 = _sign(orient2d(a_start, a_end, b_start))
+    o2 = _sign(orient2d(a_start, a_end, b_end))
+    o3 = np.ones_like(o1)
+    o4 = np.ones_like(o1)
+    # si b queda de un solo lado de a no hacen falta las otras dos orientaciones
+    k = np.flatnonzero(o1 * o2 <= 0)
+    o3[k] = _sign(orient2d(b_start[k], b_end[k], a_start[k]))
+    o4[k] = _sign(orient2d(b_start[k], b_end[k], a_end[k]))
+    on_line = (o1 == 0) & (o2 == 0)
+    mask = (o1 * o2 <= 0) & (o3 * o4 <= 0) & ~on_line
+    points = np.full((len(mask), 2), np.nan)
+    k = np.flatnonzero(mask & (o1 * o2 * o3 * o4 != 0))
+    a = a_start[k].astype(np.float64)
+    da = a_end[k].astype(np.float64) - a
+    db = b_end[k].astype(np.float64) - b_start[k].astype(np.float64)
+    diff = a - b_start[k].astype(np.float64)
+    u_a = (db[:, 0] * diff[:, 1] - db[:, 1] * diff[:, 0]) / (db[:, 1] * da[:, 0] - db[:, 0] * da[:, 1])
+    points[k] = a + u_a[:, None] * da
+    # contactos en un extremo, con la misma prioridad que segment_contact (gana la última asignación)
+    for o, v in ((o4, a_end), (o3, a_start), (o2, b_end), (o1, b_start)):
+        touch = mask & (o == 0)
+        points[touch] = v[touch]
+    # colineales: se tocan si se solapan sus cajas envolventes
+    k = np.flatnonzero(on_line)
+    overlap = np.ones(len(k), dtype=bool)
+    for c in (0, 1):
+        overlap &= ((np.minimum(a_start[k, c], a_end[k, c]) <= np.maximum(b_start[k, c], b_end[k, c]))
+                    & (np.minimum(b_start[k, c], b_end[k, c]) <= np.maximum(a_start[k, c], a_end[k, c])))
+    mask[k] = overlap
+    return mask.reshape(shape), points.reshape(shape + (2,))
+
+def clockwise_criterion(points):
+    """Suma de EarClipping._is_clockwise para un anillo (N, 2); > 0 si es horario"""
+    points, = _exact(np.asarray(points), terms=len(points))
+    x = points[:, 0]
+    y = points[:, 1]
+    return (np.roll(x, -1) - x) @ (np.roll(y, -1) + y)
@@ -0,0 +1,67 @@
+from multiprocessing import Pool
+from threading import Thread
+from time import perf_counter
+
+from helpfunctions import check_intersections
+from preprocess import prepare
+
+def validate(points, checked=False):
+    """Limpia el polígono y busca una autointersección.
+
+    Con `checked=True` los puntos ya se validaron al agregarlos (ver
+    chain.ChainValidator) y solo se limpian. Devuelve (vértices limpios,
+    intersecciones, segundos de trabajo)."""
+    start = perf_counter()
+    vertices = prepare(points).vertices
+    intersections = [] if checked else check_intersections(vertices, first_only=True)
+    return vertices, intersections, perf_counter() - start
+
+class ValidationWorker:
+    """Ejecuta validate() en un proceso aparte para que el bucle de la ventana no se bloquee.
+
+    Hay un solo trabajo a la vez: enviar otro o cancelar descarta el
+    anterior y, si todavía se estaba ejecutando, termina el proceso (el
+    siguiente envío crea uno nuevo)."""
+
+    def __init__(self):
+        self.pool = None
+        self.job = None
+        self.started = 0.0
+
+    @property
+    def busy(self):
+        return self.job is not None
+
+    def elapsed(self):
+        """Segundos desde que se envió el trabajo actual"""
+        return perf_counter() - self.started
+
+    def submit(self, points, checked=False):
+        self.cancel()
+        if self.pool is None:
+            self.pool = Pool(1)
+        self.job = self.pool.apply_async(validate, (list(points), checked))
+        self.started = perf_counter()
+
+    def ready(self):
+        """True si hay un trabajo y ya terminó"""
+        return self.job is not None and self.job.ready()
+
+    def result(self):
+        """Resultado del trabajo terminado (relanza sus excepciones); el worker queda libre"""
+        job = self.job
+        self.job = None
+        return job.get()
+
+    def cancel(self):
+        if self.job is not None and not self.job.ready():
+            # terminate() espera a los hilos internos del pool: se hace aparte para no demorar la ventana
+            Thread(target=self.pool.terminate, daemon=True).start()
+            self.pool = None
+        self.job = None
+
+    def close(self):
+        self.cancel()
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None